@@ -2,48 +2,407 @@
 # Imports
 #----------------------------------------------------------------------------#
 from __future__ import annotations
-import babel
-import dateutil.parser
+import click
+import threading
+import functools
+import hashlib
+import hmac
 import json
-import pytz
 import logging
-from datetime import datetime
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from flask import (
-    Flask, render_template, request, Response,
-    flash, redirect, url_for, abort, jsonify
+    Flask, Blueprint, current_app, render_template, request, Response,
+    flash, redirect, url_for, abort, jsonify, make_response, session,
+    stream_with_context, get_flashed_messages, g, has_request_context
 )
-from flask_migrate import Migrate
-from flask_moment import Moment
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
-from logging import Formatter, FileHandler
-from sqlalchemy.types import ARRAY
-
-from forms import ArtistForm, VenueForm, ShowForm
-from helpers import aggregate_venues
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from autocomplete import PrefixIndex
+from cache import Cache
+from exceptions import EditConflict, InvalidCursor
+from formatting import format_datetime, parse_datetime
+from genres import Genre
+from helpers import aggregate_venues, escape_like, split_location
+from importer import Importer, read_rows
+from logs import JSONFormatter, file_handler, queue_logging
+from pagination import Page, paginate
+from pool import pool_stats
+from scheduling import expand_schedule, to_naive_utc
 
 
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
-app = Flask(__name__)
-moment = Moment(app)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+db = SQLAlchemy()
+cache = Cache()
+main = Blueprint('main', __name__, cli_group=None)
+name_index = PrefixIndex()
+
+# Size in bytes of the secret key generated when SECRET_KEY is unset
+SECRET_KEY_SIZE = 32
+
+# Version marker of the detail cache as a whole. Commands that rewrite many
+# records bump it, since they cannot reach the caches of server workers.
+DETAIL_CACHE = 'detail_cache'
+# Markers whose versions make up the generation of cached detail payloads,
+# so that a write in any worker invalidates the payloads cached by the others
+DETAIL_CACHE_MARKERS = (DETAIL_CACHE, 'venues', 'artists', 'shows')
+# SQLSTATE raised by the exclusion constraints refusing overlapping shows
+EXCLUSION_VIOLATION = '23P01'
+
+
+def create_app(config_object='config', migrations=True):
+    """ Create and configure an instance of the application
+
+    Nothing is loaded from the database here, so that servers can create
+    the application once before forking workers.
+
+    - config_object: Import path of the settings
+    - migrations: Set up the `flask db` commands. Servers go without, which
+      spares them the import of Alembic.
+    """
+    from flask_moment import Moment
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.from_object(config_object)
+    if not app.config.get('SECRET_KEY'):
+        app.config['SECRET_KEY'] = instance_secret_key(app)
+
+    Moment(app)
+    db.init_app(app)
+    cache.init_app(app)
+    if migrations:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    app.register_blueprint(main)
+    if not app.debug:
+        configure_logging(app)
+    return app
+
+
+def instance_secret_key(app):
+    """ Return the secret key kept in the instance folder, creating it on
+    first use, so that every worker and restart signs sessions alike"""
+    path = os.path.join(app.instance_path, 'secret_key')
+    os.makedirs(app.instance_path, exist_ok=True)
+    if not os.path.exists(path):
+        # Written in full under a temporary name, then linked into place,
+        # which fails if another worker got there first
+        fd, temp_path = tempfile.mkstemp(dir=app.instance_path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(os.urandom(SECRET_KEY_SIZE))
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path, 'rb') as f:
+        key = f.read()
+    if len(key) != SECRET_KEY_SIZE:
+        raise RuntimeError(f'{path} does not hold a valid secret key')
+    return key
+
+
+def configure_logging(app):
+    """ Write the logs of `app` as JSON lines to a file, from a background
+    thread"""
+    path = app.config.get('LOG_FILE', 'error.log')
+
+    def make_handler():
+        log_handler = file_handler(path)
+        log_handler.setFormatter(JSONFormatter())
+        log_handler.setLevel(logging.INFO)
+        return log_handler
+
+    app.logger.setLevel(logging.INFO)
+    app.logger.removeHandler(default_handler)
+    queue_logging(
+        app.logger, make_handler,
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000)
+    )
+    # Requests are logged to the JSON file only; in debug mode the server
+    # logs them already
+    app.extensions['request_log'] = True
 
 
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
-class Venue(db.Model):
+class CatalogMixin:
+    """ Queries shared by venues and artists
+
+    `show_key` names the `Show` column that refers back to the model.
+    """
+    show_key = None
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    @classmethod
+    def cache_key(cls, id):
+        """ Return the cache key of the detail payload of `id`"""
+        return f'{cls.__tablename__}:{id}'
+
+    @classmethod
+    def counterpart(cls):
+        """ Return the model on the other side of shows"""
+        return Artist if cls is Venue else Venue
+
+    @classmethod
+    def stats_model(cls):
+        """ Return the model holding the show statistics of records"""
+        return VenueStats if cls is Venue else ArtistStats
+
+    @classmethod
+    def get_detail(cls, id, **kwargs):
+        """ Return the `detail` payload of `id`
+
+        - Raises: LookupError if there is no such record
+        """
+        record = cls.query.get(id)
+        if record is None:
+            raise LookupError(f'{cls.__name__} {id} does not exist')
+        return record.detail(**kwargs)
+
+    @classmethod
+    def cached_detail(cls, id, **kwargs):
+        """ Return the `detail` payload of `id` through the cache
+
+        The payload is cached under the versions of `DETAIL_CACHE_MARKERS`,
+        read before it is computed, so it is never older than the ETag
+        `conditional` derives from the same markers.
+
+        - Raises: LookupError if there is no such record
+        """
+        generation = [version for version, _ in
+                      TableVersion.markers(DETAIL_CACHE_MARKERS)]
+        return cache.get_or_set(
+            cls.cache_key(id),
+            lambda: cls.get_detail(id, **kwargs),
+            generation=generation
+        )
+
+    @classmethod
+    def cache_keys(cls, id):
+        """ Return the cache keys of the detail payload of `id` and of the
+        payloads listing shows with it"""
+        other = cls.counterpart()
+        ids = db.session.query(getattr(Show, other.show_key)).filter(
+            getattr(Show, cls.show_key) == id).distinct()
+        return [cls.cache_key(id)] + [other.cache_key(i) for i, in ids]
+
+    @classmethod
+    def bulk_delete(cls, ids):
+        """ Delete records with their shows and archived shows, with
+        set-based statements and without loading them
+
+        The caller owns the transaction.
+
+        - Returns: The ids actually deleted and the cache keys to invalidate
+        """
+        ids = db.any_(db.literal(list(ids), ARRAY(db.Integer)))
+        shows = Show.__table__
+        archive = ArchivedShow.__table__
+        other = cls.counterpart()
+        counterpart_ids = {row[0] for row in db.session.execute(
+            shows.delete()
+            .where(shows.c[cls.show_key] == ids)
+            .returning(shows.c[other.show_key])
+        )}
+        archived = Counter(row[0] for row in db.session.execute(
+            archive.delete()
+            .where(archive.c[cls.show_key] == ids)
+            .returning(archive.c[other.show_key])
+        ))
+        if archived:
+            other.remove_archived_stats(archived)
+            counterpart_ids.update(archived)
+        deleted_ids = [row[0] for row in db.session.execute(
+            cls.__table__.delete()
+            .where(cls.__table__.c.id == ids)
+            .returning(cls.__table__.c.id)
+        )]
+        cache_keys = [cls.cache_key(i) for i in deleted_ids] + \
+            [other.cache_key(i) for i in counterpart_ids]
+        return deleted_ids, cache_keys
+
+    @classmethod
+    def remove_archived_stats(cls, counts):
+        """ Take deleted archived shows out of the statistics of records,
+        which the trigger on shows does not see
+
+        - counts: {id: number of archived shows deleted}
+        """
+        key = cls.show_key
+        db.session.execute(db.text(f"""
+            UPDATE {cls.stats_model().__tablename__} AS stats SET
+                past_shows_count = stats.past_shows_count - removed.count,
+                last_show_time = GREATEST(
+                    (SELECT max(start_time) FROM shows_archive
+                     WHERE shows_archive.{key} = stats.{key}),
+                    (SELECT max(start_time) FROM shows, show_stats_cutoff
+                     WHERE shows.{key} = stats.{key}
+                     AND start_time < cutoff)
+                )
+            FROM unnest(:ids, :counts) AS removed (id, count)
+            WHERE stats.{key} = removed.id
+        """), {'ids': list(counts), 'counts': list(counts.values())})
+
+    @classmethod
+    def update_changed(cls, id, data, version=None):
+        """ Update only the columns of `id` whose value in `data` differs
+        from the stored one, with a single UPDATE
+
+        When `version` is given, the update only applies if the record is
+        still at that version, and it bumps the version.
+
+        - Returns: The names of the changed columns, empty if nothing changed
+        - Raises: LookupError if there is no such record, EditConflict if it
+          is no longer at `version`
+        """
+        record = cls.query.get(id)
+        if record is None:
+            raise LookupError(f'{cls.__name__} {id} does not exist')
+        if version is not None and record.version != version:
+            raise EditConflict()
+
+        editable = [c.name for c in cls.__table__.columns
+                    if c.name not in ('id', 'version')]
+        changes = {
+            key: data[key] for key in editable
+            if data.get(key) is not None and data[key] != record[key]
+        }
+        if not changes:
+            return []
+
+        updated = cls.query.filter_by(id=id, version=record.version).update(
+            dict(changes, version=cls.version + 1),
+            synchronize_session=False
+        )
+        if not updated:
+            raise EditConflict()
+        return list(changes)
+
+    @classmethod
+    def listing(cls, cursor=None, per_page=None, chunk_size=1000):
+        """ Return a page of ids and names, ordered by id"""
+        page = paginate(
+            db.session.query(cls.id, cls.name),
+            [cls.id],
+            cursor=cursor,
+            per_page=per_page,
+            chunk_size=chunk_size
+        )
+        return page._replace(items=(row._asdict() for row in page.items))
+
+    @classmethod
+    def search_criterion(cls, term):
+        """ Match a partial, case-insensitive name or city, or a genre"""
+        term = (term or '').strip()
+        pattern = f'%{escape_like(term)}%'
+        criteria = [
+            cls.name.ilike(pattern, escape='\\'),
+            cls.city.ilike(pattern, escape='\\'),
+        ]
+        genres = [g.value for g in Genre if term.lower() in g.value.lower()]
+        if term and genres:
+            criteria.append(cls.genres.overlap(genres))
+        return db.or_(*criteria)
+
+    @classmethod
+    def search_query(cls, term, genre=None, city=None, state=None):
+        """ Query lightweight summaries of the records matching a search,
+        along with their type and rank
+
+        Records match `search_criterion`, and can be narrowed down to one
+        `genre`, a `city` (case-insensitive) and a `state`. The rank is the
+        trigram similarity of the term to the name, then the city.
+        """
+        term = (term or '').strip()
+        stats = cls.stats_model()
+        query = db.session.query(
+            db.literal(cls.__tablename__, db.String).label('type'),
+            cls.id,
+            cls.name,
+            cls.city,
+            cls.state,
+            db.func.coalesce(stats.upcoming_shows_count, 0)
+            .label('num_upcoming_shows'),
+            db.func.greatest(
+                db.func.similarity(cls.name, term),
+                db.func.similarity(cls.city, term) / 2
+            ).label('rank'),
+        ).outerjoin(stats, getattr(stats, cls.show_key) == cls.id)
+        if term:
+            query = query.filter(cls.search_criterion(term))
+        if genre is not None:
+            query = query.filter(cls.genres.contains([genre]))
+        if city:
+            query = query.filter(
+                cls.city.ilike(escape_like(city.strip()), escape='\\'))
+        if state:
+            query = query.filter(cls.state == state.strip().upper())
+        return query
+
+    @classmethod
+    def search(cls, term, genre=None, page=1, per_page=None):
+        """ Search by partial, case-insensitive name or city, or by genre
+
+        Results can be narrowed down to one `genre`. They are ranked by
+        trigram similarity to the name, then the city, and returned as
+        lightweight summaries in the format
+        {"count": total matches, "data": [summaries on the page]}.
+        """
+        return search_catalog(
+            [cls.search_query(term, genre=genre)], page, per_page)
+
+    @classmethod
+    def genre_facets(cls, term=None):
+        """ Count records per genre with one aggregate query, optionally
+        among those matching the search `term`
+
+        - Returns: [{"genre": genre, "count": count}] in `Genre` order,
+          leaving out genres without any record
+        """
+        query = db.session.query(db.func.unnest(cls.genres).label('genre'))
+        if term is not None:
+            query = query.filter(cls.search_criterion(term))
+        genres = query.subquery()
+        rows = db.session.query(genres.c.genre, db.func.count()) \
+            .filter(genres.c.genre.in_([g.value for g in Genre])) \
+            .group_by(genres.c.genre)
+        counts = dict(rows.all())
+        return [
+            {"genre": g.value, "count": counts[g.value]}
+            for g in Genre if g.value in counts
+        ]
+
+
+class Venue(CatalogMixin, db.Model):
     __tablename__ = 'venues'
+    show_key = 'venue_id'
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, default='')
     genres = db.Column(ARRAY(db.String, dimensions=1), default=[])
-    city = db.Column(db.String(120), default='')
-    state = db.Column(db.String(120), default='')
+    # Bit vector of `genres` (see `Genre`), kept up to date by a trigger
+    genre_mask = db.Column(db.Integer, nullable=False, server_default='0',
+                           server_onupdate=db.FetchedValue())
+    city = db.Column(db.String(120), nullable=False, default='',
+                     server_default='')
+    state = db.Column(db.String(120), nullable=False, default='',
+                      server_default='')
     address = db.Column(db.String(120), default='')
     phone = db.Column(db.String(120), default='')
     image_link = db.Column(db.String(500), default='')
@@ -51,11 +410,20 @@ class Venue(db.Model):
     website = db.Column(db.String(120), default='')
     seeking_talent = db.Column(db.Boolean, nullable=False, default=False)
     seeking_description = db.Column(db.String(300), default='')
-
-    shows = db.relationship('Show', lazy=True)
-
-    def __getitem__(self, key):
-        return getattr(self, key)
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1')
+
+    shows = db.relationship('Show', lazy=True, passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_venues_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_venues_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_venues_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_venues_state_city', 'state', 'city'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     @classmethod
     def from_dict(cls, form):
@@ -73,31 +441,46 @@ class Venue(db.Model):
             seeking_description=form.get('seeking_description')
         )
 
-    @property
-    def past_shows(self):
-        return [show for show in self.shows if show.start_time < datetime.now()]
-
-    @property
-    def past_shows_count(self):
-        return len(self.past_shows)
-
-    @property
-    def upcoming_shows(self):
-        return [show for show in self.shows if show.start_time >= datetime.now()]
-
-    @property
-    def upcoming_shows_count(self):
-        return len(self.upcoming_shows)
-
-    @property
-    def num_upcoming_shows(self):
-        return self.upcoming_shows_count
-
     @property
     def serialize(self):
         """ Return object data in easily serializeable format"""
+        return self.detail()
 
-        return {
+    @classmethod
+    def areas(cls, cursor=None, per_page=None):
+        """ Return a page of venues grouped by city/state, with their
+        upcoming show counts read from the show statistics
+
+        - cursor, per_page: Keyset pagination over city/state pairs
+        """
+        page = paginate(
+            db.session.query(cls.state, cls.city).distinct(),
+            [cls.state, cls.city],
+            cursor=cursor,
+            per_page=per_page
+        )
+        areas = [(area.state, area.city) for area in page.items]
+        if not areas:
+            return Page([], None, None)
+
+        rows = db.session.query(
+            cls.id,
+            cls.name,
+            cls.city,
+            cls.state,
+            db.func.coalesce(VenueStats.upcoming_shows_count, 0)
+            .label('num_upcoming_shows'),
+        ).outerjoin(VenueStats, VenueStats.venue_id == cls.id).filter(
+            db.tuple_(cls.state, cls.city).in_(areas)
+        ).order_by(cls.state, cls.city, cls.name)
+        return page._replace(items=aggregate_venues(rows))
+
+    def detail(self, past_limit=None, upcoming_limit=None):
+        """ Return object data along with its shows, loaded in one query
+
+        - past_limit, upcoming_limit: Keep only the N shows closest to now
+        """
+        data = {
             "id": self.id,
             "name": self.name,
             "genres": self.genres,
@@ -109,15 +492,84 @@ class Venue(db.Model):
             "seeking_talent": self.seeking_talent,
             "seeking_description": self.seeking_description,
             "image_link": self.image_link,
-            "past_shows": [show.serialize for show in self.past_shows],
-            "upcoming_shows":  [show.serialize for show in self.upcoming_shows],
-            "past_shows_count": self.past_shows_count,
-            "upcoming_shows_count": self.upcoming_shows_count,
         }
+        data.update(Show.partitioned(
+            Show.venue_id == self.id,
+            past_limit=past_limit,
+            upcoming_limit=upcoming_limit
+        ))
+        data["archived_shows_count"] = ArchivedShow.count(
+            ArchivedShow.venue_id == self.id)
+        data["past_shows_count"] += data["archived_shows_count"]
+        return data
 
-
-class Artist(db.Model):
+    @classmethod
+    def recommended_artists(cls, id, history_weight=0.5, limit=None):
+        """ Rank the artists who would fit venue `id`, in a single query
+
+        Genres are compared as bit vectors, with the Jaccard similarity of
+        their bits. An artist scores by its similarity to the genres of the
+        venue and, with `history_weight`, by its average similarity to the
+        artists of the venue's shows, archived ones included, weighted by
+        their number of shows.
+
+        - Returns: [{"id", "name", "image_link", "genres", "shared_genres",
+          "score"}] best first, leaving out artists scoring 0
+        """
+        venue_mask = db.session.query(cls.genre_mask) \
+            .filter(cls.id == id).as_scalar()
+        # Genres of the venue's shows, archived ones included, computed once
+        shows = db.union_all(
+            db.select([Show.artist_id]).where(Show.venue_id == id),
+            db.select([ArchivedShow.artist_id])
+            .where(ArchivedShow.venue_id == id)
+        ).alias('venue_shows')
+        history = db.session.query(
+            Artist.genre_mask.label('genre_mask'),
+            db.func.count().label('shows_count')
+        ).join(shows, shows.c.artist_id == Artist.id) \
+            .group_by(Artist.genre_mask).cte('history')
+        # Artists sharing no genre bit with the venue or its shows score 0
+        fit_mask = venue_mask.op('|')(db.session.query(
+            db.func.coalesce(db.func.bit_or(history.c.genre_mask), 0)
+        ).correlate(None).as_scalar())
+        history_score = db.func.sum(
+            history.c.shows_count * db.func.genre_similarity(
+                Artist.genre_mask, history.c.genre_mask)
+        ) / db.func.sum(history.c.shows_count)
+        score = (
+            (1 - history_weight)
+            * db.func.genre_similarity(Artist.genre_mask, venue_mask)
+            + history_weight * db.func.coalesce(history_score, 0)
+        ).label('score')
+
+        rows = db.session.query(
+            Artist.id,
+            Artist.name,
+            Artist.image_link,
+            Artist.genres,
+            Artist.genre_mask.op('&')(venue_mask).label('shared_mask'),
+            score
+        ).outerjoin(history, db.true()) \
+            .filter(Artist.genre_mask.op('&')(fit_mask) != 0) \
+            .group_by(Artist.id) \
+            .order_by(score.desc(), Artist.name, Artist.id) \
+            .limit(limit)
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "image_link": row.image_link,
+                "genres": row.genres,
+                "shared_genres": Genre.from_mask(row.shared_mask or 0),
+                "score": round(row.score, 3),
+            } for row in rows
+        ]
+
+
+class Artist(CatalogMixin, db.Model):
     __tablename__ = 'artists'
+    show_key = 'artist_id'
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, default='')
@@ -125,13 +577,28 @@ class Artist(db.Model):
     state = db.Column(db.String(120), default='')
     phone = db.Column(db.String(120), default='')
     genres = db.Column(ARRAY(db.String, dimensions=1), default=[])
+    # Bit vector of `genres` (see `Genre`), kept up to date by a trigger
+    genre_mask = db.Column(db.Integer, nullable=False, server_default='0',
+                           server_onupdate=db.FetchedValue())
     image_link = db.Column(db.String(500), default='')
     website = db.Column(db.String(120), default='')
     facebook_link = db.Column(db.String(120), default='')
     seeking_venue = db.Column(db.Boolean, nullable=False, default=False)
     seeking_description = db.Column(db.String(300), default='')
-
-    shows = db.relationship('Show', lazy=True)
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        server_default='1')
+
+    shows = db.relationship('Show', lazy=True, passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_artists_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_artists_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_artists_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_artists_state_city', 'state', 'city'),
+    )
+    __mapper_args__ = {'version_id_col': version}
 
     @classmethod
     def from_dict(cls, form):
@@ -148,31 +615,17 @@ class Artist(db.Model):
             seeking_description=form.get('seeking_description')
         )
 
-    @property
-    def past_shows(self):
-        return [show for show in self.shows if show.start_time < datetime.now()]
-
-    @property
-    def past_shows_count(self):
-        return len(self.past_shows)
-
-    @property
-    def upcoming_shows(self):
-        return [show for show in self.shows if show.start_time >= datetime.now()]
-
-    @property
-    def upcoming_shows_count(self):
-        return len(self.upcoming_shows)
-
-    @property
-    def num_upcoming_shows(self):
-        return self.upcoming_shows_count
-
     @property
     def serialize(self):
         """ Return object data in easily serializeable format"""
+        return self.detail()
 
-        return {
+    def detail(self, past_limit=None, upcoming_limit=None):
+        """ Return object data along with its shows, loaded in one query
+
+        - past_limit, upcoming_limit: Keep only the N shows closest to now
+        """
+        data = {
             "id": self.id,
             "name": self.name,
             "genres": self.genres,
@@ -184,11 +637,50 @@ class Artist(db.Model):
             "seeking_venue": self.seeking_venue,
             "seeking_description": self.seeking_description,
             "image_link": self.image_link,
-            "past_shows": [show.serialize for show in self.past_shows],
-            "upcoming_shows":  [show.serialize for show in self.upcoming_shows],
-            "past_shows_count": self.past_shows_count,
-            "upcoming_shows_count": self.upcoming_shows_count,
         }
+        data.update(Show.partitioned(
+            Show.artist_id == self.id,
+            past_limit=past_limit,
+            upcoming_limit=upcoming_limit
+        ))
+        data["archived_shows_count"] = ArchivedShow.count(
+            ArchivedShow.artist_id == self.id)
+        data["past_shows_count"] += data["archived_shows_count"]
+        return data
+
+
+def search_catalog(queries, page=1, per_page=None):
+    """ Rank the results of several `search_query` queries together, in a
+    single UNION ALL query
+
+    - Returns: {"count": total matches, "data": [summaries on the page]},
+      where each summary has the type of its record
+    """
+    selects = [query.statement for query in queries]
+    results = (
+        db.union_all(*selects) if len(selects) > 1 else selects[0]
+    ).alias('results')
+    query = db.session.query(
+        results, db.func.count().over().label('total')
+    ).order_by(
+        results.c.rank.desc(), results.c.name, results.c.type, results.c.id)
+    if per_page:
+        query = query.limit(per_page).offset((page - 1) * per_page)
+
+    rows = query.all()
+    return {
+        "count": rows[0].total if rows else 0,
+        "data": [
+            {
+                "type": row.type,
+                "id": row.id,
+                "name": row.name,
+                "city": row.city,
+                "state": row.state,
+                "num_upcoming_shows": row.num_upcoming_shows,
+            } for row in rows
+        ]
+    }
 
 
 class Show(db.Model):
@@ -196,14 +688,24 @@ class Show(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey(
-        'venues.id'), nullable=False)
+        'venues.id', ondelete='CASCADE'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey(
-        'artists.id'), nullable=False)
+        'artists.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
 
     venue = db.relationship('Venue', lazy=True)
     artist = db.relationship('Artist', lazy=True)
 
+    # How long a show books its venue and artist. The exclusion constraints
+    # of the shows table rely on the same value.
+    duration = timedelta(hours=2)
+
+    __table_args__ = (
+        db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+        db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+    )
+
     @classmethod
     def from_dict(cls, form):
         return cls(
@@ -223,89 +725,829 @@ class Show(db.Model):
             "artist_id": self.artist_id,
             "artist_name": self.artist.name,
             "artist_image_link": self.artist.image_link,
-            "start_time": self.start_time.replace(tzinfo=pytz.utc).isoformat()
+            "start_time":
+                self.start_time.replace(tzinfo=timezone.utc).isoformat()
+        }
+
+    @classmethod
+    def conflicts(cls, start, end=None, venue_id=None, artist_id=None):
+        """ Return the shows booking the venue or the artist within
+        [start, end), which defaults to the duration of one show
+
+        Each party is an index range scan on (party, start_time).
+        """
+        end = end or start + cls.duration
+        parties = []
+        if venue_id is not None:
+            parties.append(cls.venue_id == venue_id)
+        if artist_id is not None:
+            parties.append(cls.artist_id == artist_id)
+        if not parties:
+            return []
+        return cls.eager().filter(
+            db.or_(*parties),
+            cls.start_time > start - cls.duration,
+            cls.start_time < end
+        ).order_by(cls.start_time).all()
+
+    @classmethod
+    def bulk_create(cls, artist_id, venue_id, start_times):
+        """ Insert shows of an artist at a venue with one multi-row INSERT
+
+        The caller owns the transaction.
+        """
+        db.session.execute(cls.__table__.insert().values([
+            {
+                'artist_id': artist_id,
+                'venue_id': venue_id,
+                'start_time': start_time
+            } for start_time in start_times
+        ]))
+
+    @classmethod
+    def eager(cls):
+        """ Query shows with their venue and artist joined in, so that
+        `serialize` does not lazy load them one show at a time"""
+        return cls.query.options(
+            db.joinedload(cls.venue), db.joinedload(cls.artist))
+
+    @classmethod
+    def listing_query(cls):
+        """ Query shows with only the columns the listing page needs, in a
+        single joined query"""
+        return db.session.query(
+            cls.id,
+            cls.venue_id,
+            Venue.name.label('venue_name'),
+            cls.artist_id,
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            cls.start_time,
+        ).join(Venue, Venue.id == cls.venue_id) \
+            .join(Artist, Artist.id == cls.artist_id)
+
+    @staticmethod
+    def serialize_listing_row(row):
+        return dict(
+            row._asdict(),
+            start_time=row.start_time.replace(tzinfo=timezone.utc).isoformat()
+        )
+
+    @classmethod
+    def listing(cls, cursor=None, per_page=None, chunk_size=1000):
+        """ Return a page of shows as listed on the listing page"""
+        page = paginate(
+            cls.listing_query(),
+            [cls.start_time, cls.id],
+            cursor=cursor,
+            per_page=per_page,
+            chunk_size=chunk_size
+        )
+        return page._replace(
+            items=(cls.serialize_listing_row(row) for row in page.items))
+
+    @staticmethod
+    def serialize_row(row):
+        """ Return a joined show row in the same format as `serialize`"""
+
+        return {
+            "venue_id": row.venue_id,
+            "venue_name": row.venue_name,
+            "venue_image_link": row.venue_image_link,
+            "artist_id": row.artist_id,
+            "artist_name": row.artist_name,
+            "artist_image_link": row.artist_image_link,
+            "start_time":
+                row.start_time.replace(tzinfo=timezone.utc).isoformat()
+        }
+
+    @classmethod
+    def partitioned(cls, criterion, now=None, past_limit=None,
+                    upcoming_limit=None):
+        """ Load past and upcoming shows matching `criterion` in one query
+
+        Both partitions share a single cutoff time. Each row carries the
+        size of its partition and its rank by distance from the cutoff, so
+        counts stay exact when the lists are limited.
+        """
+        now = now or datetime.now()
+        is_past = cls.start_time < now
+        distance = db.case(
+            [(is_past, db.literal(now) - cls.start_time)],
+            else_=cls.start_time - db.literal(now)
+        )
+        ranked = db.session.query(
+            cls.venue_id,
+            Venue.name.label('venue_name'),
+            Venue.image_link.label('venue_image_link'),
+            cls.artist_id,
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            cls.start_time,
+            is_past.label('is_past'),
+            db.func.count().over(partition_by=is_past).label('total'),
+            db.func.row_number().over(
+                partition_by=is_past, order_by=distance).label('position'),
+        ).join(Venue, Venue.id == cls.venue_id) \
+            .join(Artist, Artist.id == cls.artist_id) \
+            .filter(criterion) \
+            .subquery()
+
+        query = db.session.query(ranked).order_by(ranked.c.start_time)
+        if past_limit is not None:
+            query = query.filter(db.or_(
+                ~ranked.c.is_past, ranked.c.position <= past_limit))
+        if upcoming_limit is not None:
+            query = query.filter(db.or_(
+                ranked.c.is_past, ranked.c.position <= upcoming_limit))
+
+        data = {
+            "past_shows": [],
+            "upcoming_shows": [],
+            "past_shows_count": 0,
+            "upcoming_shows_count": 0,
         }
+        for row in query:
+            key = 'past_shows' if row.is_past else 'upcoming_shows'
+            data[key].append(cls.serialize_row(row))
+            data[f'{key}_count'] = row.total
+        return data
+
+
+class ArchivedShow(db.Model):
+    """ Show moved out of the shows table once long past, so queries on
+    shows only scan recent and upcoming ones"""
+    __tablename__ = 'shows_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    venue_id = db.Column(
+        db.Integer,
+        db.ForeignKey('venues.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    artist_id = db.Column(
+        db.Integer,
+        db.ForeignKey('artists.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    start_time = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_shows_archive_venue_id_start_time',
+                 'venue_id', 'start_time', 'id'),
+        db.Index('ix_shows_archive_artist_id_start_time',
+                 'artist_id', 'start_time', 'id'),
+    )
+
+    @classmethod
+    def archive(cls, before, batch_size=10000):
+        """ Move the shows that started before `before` to the archive, one
+        batch per transaction
+
+        The show statistics trigger is skipped, since archived shows still
+        count as past shows. For that, `before` is capped at the statistics
+        cutoff: later shows are still counted as upcoming.
+        - Returns: The number of archived shows
+        """
+        before = min(before, db.session.query(ShowStatsCutoff.cutoff).scalar())
+        moved = 0
+        while True:
+            db.session.execute(db.text(
+                "SET LOCAL fyyur.archiving = 'on'"))
+            count = db.session.execute(db.text("""
+                WITH moved AS (
+                    DELETE FROM shows WHERE id IN (
+                        SELECT id FROM shows WHERE start_time < :before
+                        ORDER BY start_time, id
+                        LIMIT :batch_size
+                    )
+                    RETURNING id, venue_id, artist_id, start_time
+                )
+                INSERT INTO shows_archive (id, venue_id, artist_id, start_time)
+                SELECT id, venue_id, artist_id, start_time FROM moved
+            """), {'before': before, 'batch_size': batch_size}).rowcount
+            db.session.commit()
+            moved += count
+            if count < batch_size:
+                return moved
+
+    @classmethod
+    def count(cls, criterion):
+        return db.session.query(db.func.count(cls.id)) \
+            .filter(criterion).scalar()
+
+    @classmethod
+    def history(cls, criterion, cursor=None, per_page=None):
+        """ Return a page of the archived shows matching `criterion`, in the
+        format of the show listing"""
+        page = paginate(
+            db.session.query(
+                cls.id,
+                cls.venue_id,
+                Venue.name.label('venue_name'),
+                cls.artist_id,
+                Artist.name.label('artist_name'),
+                Artist.image_link.label('artist_image_link'),
+                cls.start_time,
+            ).join(Venue, Venue.id == cls.venue_id)
+            .join(Artist, Artist.id == cls.artist_id)
+            .filter(criterion),
+            [cls.start_time, cls.id],
+            cursor=cursor,
+            per_page=per_page
+        )
+        return page._replace(
+            items=[Show.serialize_listing_row(row) for row in page.items])
+
+
+class TableVersion(db.Model):
+    """ Version marker of a table, bumped by a database trigger on every
+    statement that writes to it"""
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def markers(cls, tables):
+        """ Return (version, updated_at) of each of `tables` in one query"""
+        rows = db.session.query(cls.table_name, cls.version, cls.updated_at) \
+            .filter(cls.table_name.in_(tables))
+        found = {row.table_name: (row.version, row.updated_at) for row in rows}
+        return [found.get(table, (0, datetime.min)) for table in tables]
+
+    @classmethod
+    def bump(cls, table):
+        """ Bump the version marker of `table` the way the triggers do, for
+        markers that no trigger maintains"""
+        db.session.execute(db.text("""
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (:table, 1, timezone('utc', now()))
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_versions.version + 1,
+                updated_at = EXCLUDED.updated_at
+        """), {'table': table})
+
+
+class ShowStatsMixin:
+    """ Show counts and times of a venue or artist, as of the cutoff time in
+    `ShowStatsCutoff`
+
+    A trigger on shows updates them incrementally on every write, and
+    `ShowStatsCutoff.advance` moves shows from upcoming to past as time
+    goes by.
+    """
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0,
+                                 server_default='0')
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0,
+                                     server_default='0')
+    next_show_time = db.Column(db.DateTime)
+    last_show_time = db.Column(db.DateTime)
+
+
+class VenueStats(ShowStatsMixin, db.Model):
+    __tablename__ = 'venue_stats'
+
+    venue_id = db.Column(
+        db.Integer,
+        db.ForeignKey('venues.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+
+class ArtistStats(ShowStatsMixin, db.Model):
+    __tablename__ = 'artist_stats'
+
+    artist_id = db.Column(
+        db.Integer,
+        db.ForeignKey('artists.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+
+class ShowStatsCutoff(db.Model):
+    """ Single row holding the time that splits past from upcoming shows in
+    the show statistics"""
+    __tablename__ = 'show_stats_cutoff'
+    __table_args__ = (db.CheckConstraint('id'),)
+
+    id = db.Column(db.Boolean, primary_key=True, default=True)
+    cutoff = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def lock(cls):
+        """ Return the current cutoff, locking it until the end of the
+        transaction so that the trigger on shows waits for the update"""
+        return db.session.query(cls.cutoff).with_for_update().scalar()
+
+    @classmethod
+    def advance(cls, now=None):
+        """ Move the shows that started since the last cutoff from upcoming to
+        past, touching only the statistics of their venues and artists
+
+        - Returns: The new cutoff
+        """
+        now = now or datetime.now()
+        cutoff = cls.lock()
+        for model in (Venue, Artist):
+            key = model.show_key
+            table = model.stats_model().__tablename__
+            db.session.execute(db.text(f"""
+                UPDATE {table} AS stats SET
+                    past_shows_count = stats.past_shows_count + moved.count,
+                    upcoming_shows_count =
+                        stats.upcoming_shows_count - moved.count,
+                    last_show_time =
+                        GREATEST(stats.last_show_time, moved.last_show_time),
+                    next_show_time = (
+                        SELECT min(start_time) FROM shows
+                        WHERE shows.{key} = stats.{key}
+                        AND start_time >= :now
+                    )
+                FROM (
+                    SELECT {key}, count(*) AS count,
+                        max(start_time) AS last_show_time
+                    FROM shows
+                    WHERE start_time >= :cutoff AND start_time < :now
+                    GROUP BY {key}
+                ) AS moved
+                WHERE stats.{key} = moved.{key}
+            """), {'cutoff': cutoff, 'now': now})
+        db.session.query(cls).update({cls.cutoff: now})
+        return now
+
+    @classmethod
+    def rebuild(cls, now=None):
+        """ Recompute all the statistics from the shows and their archive"""
+        now = now or datetime.now()
+        cls.lock()
+        for model in (Venue, Artist):
+            key = model.show_key
+            table = model.stats_model().__tablename__
+            db.session.execute(db.text(f'DELETE FROM {table}'))
+            db.session.execute(db.text(f"""
+                INSERT INTO {table} ({key}, past_shows_count,
+                    upcoming_shows_count, next_show_time, last_show_time)
+                SELECT {key},
+                    count(*) FILTER (WHERE start_time < :now),
+                    count(*) FILTER (WHERE start_time >= :now),
+                    min(start_time) FILTER (WHERE start_time >= :now),
+                    max(start_time) FILTER (WHERE start_time < :now)
+                FROM (
+                    SELECT {key}, start_time FROM shows
+                    UNION ALL
+                    SELECT {key}, start_time FROM shows_archive
+                ) AS all_shows
+                GROUP BY {key}
+            """), {'now': now})
+        db.session.query(cls).update({cls.cutoff: now})
+        return now
 
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
-
-
-app.jinja_env.filters['datetime'] = format_datetime
+main.add_app_template_filter(format_datetime, 'datetime')
 
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
-@app.route('/')
+def conditional(*tables):
+    """ Answer conditional GET requests for a view depending on `tables`
+
+    The ETag and Last-Modified values derive from the version markers of
+    `tables` and the current time window, since pages also depend on which
+    shows are upcoming. Matching requests get a 304 before the view runs.
+    Views serving cached payloads must cache them under the same markers
+    (see `cached_detail`), or a stale body gets pinned under a fresh ETag.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if '_flashes' in session:
+                return view(*args, **kwargs)
+
+            try:
+                markers = TableVersion.markers(tables)
+            except:
+                abort(500)
+            finally:
+                db.session.close()
+            window = current_app.config.get('CONDITIONAL_GET_WINDOW', 300)
+            window_start = int(time.time() // window * window)
+            etag = hashlib.sha1(repr(
+                (request.full_path, wants_json(), window_start, markers)
+            ).encode()).hexdigest()
+            last_modified = max(
+                [datetime.utcfromtimestamp(window_start)]
+                + [updated_at for _, updated_at in markers]
+            )
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = request.if_modified_since is not None and \
+                    request.if_modified_since.replace(tzinfo=None) \
+                    >= last_modified.replace(microsecond=0)
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+
+def internal(view):
+    """ Serve a view only to clients sending the INTERNAL_STATS_TOKEN as a
+    bearer token, and answer 404 to everyone when the token is unset"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('INTERNAL_STATS_TOKEN')
+        given = request.headers.get('Authorization', '')
+        if not token or not hmac.compare_digest(
+                given.encode(), f'Bearer {token}'.encode()):
+            abort(404)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def load_name_index():
+    """ (Re)build the autocomplete index from the venue and artist names"""
+    try:
+        records = [
+            (model.__tablename__, id, name)
+            for model in (Venue, Artist)
+            for id, name in db.session.query(model.id, model.name)
+        ]
+    finally:
+        db.session.close()
+    name_index.build(records)
+
+
+def refresh_name_index():
+    """ Build the autocomplete index on first use, then rebuild it in the
+    background every AUTOCOMPLETE_REFRESH seconds to pick up changes made by
+    other workers"""
+    max_age = current_app.config.get('AUTOCOMPLETE_REFRESH', 300)
+    if name_index.built_at is None:
+        load_name_index()
+    elif name_index.is_stale(max_age):
+        # Push the rebuild back so that only one is started
+        name_index.built_at += max_age
+        load_name_index_in_background()
+
+
+def load_name_index_in_background():
+    app = current_app._get_current_object()
+
+    def rebuild():
+        with app.app_context():
+            try:
+                load_name_index()
+            except Exception:
+                app.logger.exception('Could not build the autocomplete index')
+
+    threading.Thread(target=rebuild, daemon=True).start()
+
+
+def invalidate_detail_cache():
+    """ Invalidate the cached detail payloads of every process"""
+    TableVersion.bump(DETAIL_CACHE)
+    db.session.commit()
+    cache.clear()
+
+
+def delete_records(model, ids):
+    """ Delete venues or artists with their shows in one transaction"""
+    # bool is a subclass of int, but true is no id
+    if not isinstance(ids, list) or \
+            not all(type(i) is int for i in ids):
+        return jsonify({
+            'status': 'failed',
+            'message': 'ids must be a list of integers'
+        }), 400
+    limit = current_app.config.get('BULK_DELETE_MAX', 10000)
+    if len(ids) > limit:
+        return jsonify({
+            'status': 'failed',
+            'message': f'At most {limit} records can be deleted at once'
+        }), 400
+
+    try:
+        deleted_ids, cache_keys = model.bulk_delete(ids)
+        db.session.commit()
+        cache.delete(*cache_keys)
+        for id in deleted_ids:
+            name_index.remove(model.__tablename__, id)
+        res = {'status': 'success', 'ids': deleted_ids}
+    except:
+        db.session.rollback()
+        res = {'status': 'failed'}
+    finally:
+        db.session.close()
+    return jsonify(res)
+
+
+def show_history(model, id):
+    """ Render the archived shows of a venue or artist, page by page"""
+    cursor = request.args.get('cursor')
+    try:
+        record = db.session.query(model.id, model.name) \
+            .filter(model.id == id).first()
+        page = record and ArchivedShow.history(
+            getattr(ArchivedShow, model.show_key) == id,
+            cursor=cursor,
+            per_page=current_app.config.get('LISTING_PER_PAGE')
+        )
+    except InvalidCursor:
+        abort(400)
+    except:
+        abort(500)
+    finally:
+        db.session.close()
+    if record is None:
+        abort(404)
+    if wants_json():
+        return jsonify({
+            'data': page.items,
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+        })
+    return render_template(
+        'pages/show_history.html',
+        record=record._asdict(),
+        kind=model.__tablename__,
+        shows=page.items,
+        page=page
+    )
+
+
+def wants_json():
+    """ Whether to answer with JSON: on /api routes, or when the client
+    prefers JSON over HTML"""
+    if request.path.startswith('/api/'):
+        return True
+    mimetypes = request.accept_mimetypes
+    best = mimetypes.best_match(['text/html', 'application/json'])
+    return best == 'application/json' and \
+        mimetypes[best] > mimetypes['text/html']
+
+
+def stream_json(query, serialize):
+    """ Stream the rows of `query` as a JSON array
+
+    Rows are fetched from a server-side cursor and sent in chunks, so the
+    listing is never held in memory as a whole.
+    """
+    chunk_size = current_app.config.get('STREAM_CHUNK_SIZE', 1000)
+
+    def generate():
+        try:
+            yield '['
+            chunk = []
+            separator = ''
+            for row in query.yield_per(chunk_size):
+                chunk.append(separator + json.dumps(serialize(row)))
+                separator = ','
+                if len(chunk) >= chunk_size:
+                    yield ''.join(chunk)
+                    chunk = []
+            yield ''.join(chunk) + ']'
+        finally:
+            db.session.close()
+
+    return Response(
+        stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_template(template_name, **context):
+    """ Render a template progressively, sending each part of the page as
+    soon as it is rendered
+
+    Rows of lazy iterables in `context` are then fetched while the response
+    is being sent, so the first byte goes out before the last row is read.
+    """
+    # Flashed messages live in the session cookie, which is saved before the
+    # body is streamed, so they have to be consumed up front
+    get_flashed_messages()
+    current_app.update_template_context(context)
+    stream = current_app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(
+        current_app.config.get('STREAM_TEMPLATE_BUFFER', 5))
+
+    def generate():
+        try:
+            yield from stream
+        finally:
+            db.session.close()
+
+    return Response(stream_with_context(generate()))
+
+
+def valid_genre(genre):
+    """ Return `genre` if it is one of `Genre`, otherwise abort with 400"""
+    if not genre:
+        return None
+    if genre not in {g.value for g in Genre}:
+        abort(400)
+    return genre
+
+
+def valid_page(page):
+    """ Return `page` if it is a page number, otherwise abort with 400"""
+    if page < 1:
+        abort(400)
+    return page
+
+
+@main.route('/')
 def index():
     return render_template('pages/home.html')
 
 
 #  Venues
 #  ----------------------------------------------------------------
-@app.route('/venues')
+@main.route('/venues')
+@main.route('/api/venues', endpoint='api_venues')
+@conditional('venues', 'shows')
 def venues():
+    if wants_json():
+        return stream_json(
+            db.session.query(Venue.id, Venue.name, Venue.city, Venue.state)
+            .order_by(Venue.state, Venue.city, Venue.id),
+            lambda row: row._asdict()
+        )
+
+    cursor = request.args.get('cursor')
     try:
-        venues = Venue.query.all()
-        data = aggregate_venues(venues)
+        page = Venue.areas(
+            cursor=cursor,
+            per_page=current_app.config.get('VENUE_AREAS_PER_PAGE')
+        )
+    except InvalidCursor:
+        abort(400)
     except:
         abort(500)
     finally:
         db.session.close()
-    return render_template('pages/venues.html', areas=data)
+    return render_template('pages/venues.html', areas=page.items, page=page)
 
 
-@app.route('/venues/search', methods=['POST'])
+@main.route('/venues/search', methods=['GET', 'POST'])
+@main.route('/api/venues/search',
+            methods=['GET', 'POST'], endpoint='api_search_venues')
 def search_venues():
-    search_term = request.form.get('search_term')
+    search_term = request.values.get('search_term', '')
+    genre = valid_genre(request.values.get('genre'))
+    page = valid_page(request.args.get('page', 1, type=int))
     try:
-        venues = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
-        response = {
-            "count": len(venues),
-            "data": [v.serialize for v in venues]
-        }
+        response = Venue.search(
+            search_term,
+            genre=genre,
+            page=page,
+            per_page=current_app.config.get('SEARCH_RESULTS_PER_PAGE')
+        )
+        facets = Venue.genre_facets(search_term)
     except:
         abort(500)
     finally:
         db.session.close()
+    if wants_json():
+        return jsonify(dict(response, facets=facets))
     return render_template(
         'pages/search_venues.html',
         results=response,
-        search_term=request.form.get('search_term', '')
+        facets=facets,
+        search_term=search_term,
+        genre=genre,
+        page=page,
+        per_page=current_app.config.get('SEARCH_RESULTS_PER_PAGE')
+    )
+
+
+@main.route('/search', methods=['GET', 'POST'])
+@main.route('/api/search', methods=['GET', 'POST'], endpoint='api_search')
+def search():
+    """ Search venues and artists together
+        - Parameters: search_term; optional city, state, genre and type
+          (venues or artists). A search term like "San Francisco, CA"
+          searches by city and state.
+        - Returns: The matches of both types, ranked together
+    """
+    search_term = request.values.get('search_term', '').strip()
+    city = request.values.get('city', '').strip()
+    state = request.values.get('state', '').strip()
+    genre = valid_genre(request.values.get('genre'))
+    kind = request.values.get('type') or None
+    if kind not in (None, 'venues', 'artists'):
+        abort(400)
+    if not (city or state):
+        location = split_location(search_term)
+        if location:
+            search_term = ''
+            city, state = location
+    page = valid_page(request.args.get('page', 1, type=int))
+    per_page = current_app.config.get('SEARCH_RESULTS_PER_PAGE')
+
+    try:
+        response = search_catalog(
+            [
+                model.search_query(
+                    search_term, genre=genre, city=city, state=state)
+                for model in (Venue, Artist)
+                if kind in (None, model.__tablename__)
+            ],
+            page=page,
+            per_page=per_page
+        )
+    except:
+        abort(500)
+    finally:
+        db.session.close()
+    if wants_json():
+        return jsonify(response)
+    return render_template(
+        'pages/search.html',
+        results=response,
+        search_term=search_term,
+        filters={'city': city, 'state': state, 'genre': genre, 'type': kind},
+        genres=[g.value for g in Genre],
+        page=page,
+        per_page=per_page
     )
 
 
-@app.route('/venues/<int:venue_id>')
+@main.route('/venues/<int:venue_id>')
+@main.route('/api/venues/<int:venue_id>', endpoint='api_show_venue')
+@conditional('venues', 'artists', 'shows')
 def show_venue(venue_id):
     try:
-        venue = Venue.query.get(venue_id)
-        data = venue.serialize
+        data = Venue.cached_detail(
+            venue_id, past_limit=current_app.config.get('PAST_SHOWS_LIMIT'))
+    except LookupError:
+        abort(404)
     except:
         abort(500)
     finally:
         db.session.close()
+    if wants_json():
+        return jsonify(data)
     return render_template('pages/show_venue.html', venue=data)
 
 
+@main.route('/venues/<int:venue_id>/history')
+@main.route('/api/venues/<int:venue_id>/history', endpoint='api_venue_history')
+@conditional('venues', 'artists', 'shows')
+def venue_history(venue_id):
+    return show_history(Venue, venue_id)
+
+
+@main.route('/venues/<int:venue_id>/recommendations')
+@main.route('/api/venues/<int:venue_id>/recommendations',
+            endpoint='api_venue_recommendations')
+@conditional('venues', 'artists', 'shows')
+def venue_recommendations(venue_id):
+    """ Artists who would fit a venue, by genre and by the venue's shows"""
+    try:
+        venue = db.session.query(Venue.id, Venue.name, Venue.genres) \
+            .filter(Venue.id == venue_id).first()
+        artists = venue and Venue.recommended_artists(
+            venue_id,
+            history_weight=current_app.config.get(
+                'RECOMMENDATION_HISTORY_WEIGHT', 0.5),
+            limit=current_app.config.get('RECOMMENDATIONS_LIMIT')
+        )
+    except:
+        abort(500)
+    finally:
+        db.session.close()
+    if venue is None:
+        abort(404)
+    if wants_json():
+        return jsonify({'data': artists})
+    return render_template(
+        'pages/recommendations.html', venue=venue._asdict(), artists=artists)
+
+
 #  Create Venue
 #  ----------------------------------------------------------------
-@app.route('/venues/create', methods=['GET'])
+@main.route('/venues/create', methods=['GET'])
 def create_venue_form():
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/create', methods=['POST'])
+@main.route('/venues/create', methods=['POST'])
 def create_venue_submission():
+    from forms import VenueForm
     form = VenueForm()
     if not form.validate_on_submit():
         flash(f'An error occurred. Venue could not be listed.', 'error')
@@ -315,6 +1557,7 @@ def create_venue_submission():
         new_venue = Venue.from_dict(form.data)
         db.session.add(new_venue)
         db.session.commit()
+        name_index.add('venues', new_venue.id, new_venue.name)
         flash(f'Venue {new_venue.name} was successfully listed!')
     except:
         db.session.rollback()
@@ -324,74 +1567,130 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@main.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
-    try:
-        Venue.query.filter_by(id=venue_id).delete()
-        db.session.commit()
-        res = {'status': 'success'}
-    except:
-        db.session.rollback()
-        res = {'status': 'failed'}
-    finally:
-        db.session.close()
-    return jsonify(res)
+    return delete_records(Venue, [venue_id])
+
+
+@main.route('/venues/delete', methods=['POST'])
+def bulk_delete_venues():
+    """ Delete venues and their shows
+        - Request body: JSON with ids, a list of venue ids
+        - Returns: The ids of the deleted venues
+    """
+    payload = request.get_json(silent=True) or {}
+    return delete_records(Venue, payload.get('ids'))
 
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@main.route('/artists')
+@main.route('/api/artists', endpoint='api_artists')
+@conditional('artists')
 def artists():
+    if wants_json():
+        return stream_json(
+            db.session.query(Artist.id, Artist.name).order_by(Artist.id),
+            lambda row: row._asdict()
+        )
+
+    cursor = request.args.get('cursor')
     try:
-        artists = Artist.query.all()
-        data = [artist.serialize for artist in artists]
+        page = Artist.listing(
+            cursor=cursor,
+            per_page=current_app.config.get('LISTING_PER_PAGE'),
+            chunk_size=current_app.config.get('STREAM_CHUNK_SIZE', 1000)
+        )
+    except InvalidCursor:
+        abort(400)
     except:
         abort(500)
     finally:
         db.session.close()
-    return render_template('pages/artists.html', artists=data)
+    return stream_template('pages/artists.html', artists=page.items, page=page)
 
 
-@app.route('/artists/search', methods=['POST'])
+@main.route('/artists/search', methods=['GET', 'POST'])
+@main.route('/api/artists/search',
+            methods=['GET', 'POST'], endpoint='api_search_artists')
 def search_artists():
-    search_term = request.form.get('search_term')
+    search_term = request.values.get('search_term', '')
+    genre = valid_genre(request.values.get('genre'))
+    page = valid_page(request.args.get('page', 1, type=int))
     try:
-        artists = Artist.query.filter(
-            Artist.name.ilike(f'%{search_term}%')).all()
-        response = {
-            "count": len(artists),
-            "data": [a.serialize for a in artists]
-        }
+        response = Artist.search(
+            search_term,
+            genre=genre,
+            page=page,
+            per_page=current_app.config.get('SEARCH_RESULTS_PER_PAGE')
+        )
+        facets = Artist.genre_facets(search_term)
     except:
         abort(500)
     finally:
         db.session.close()
+    if wants_json():
+        return jsonify(dict(response, facets=facets))
     return render_template(
         'pages/search_artists.html',
         results=response,
-        search_term=request.form.get('search_term', '')
+        facets=facets,
+        search_term=search_term,
+        genre=genre,
+        page=page,
+        per_page=current_app.config.get('SEARCH_RESULTS_PER_PAGE')
     )
 
 
-@app.route('/artists/<int:artist_id>')
+@main.route('/artists/<int:artist_id>')
+@main.route('/api/artists/<int:artist_id>', endpoint='api_show_artist')
+@conditional('venues', 'artists', 'shows')
 def show_artist(artist_id):
     try:
-        artist = Artist.query.get(artist_id)
-        data = artist.serialize
+        data = Artist.cached_detail(
+            artist_id, past_limit=current_app.config.get('PAST_SHOWS_LIMIT'))
+    except LookupError:
+        abort(404)
     except:
         abort(500)
     finally:
         db.session.close()
+    if wants_json():
+        return jsonify(data)
     return render_template('pages/show_artist.html', artist=data)
 
 
+@main.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    return delete_records(Artist, [artist_id])
+
+
+@main.route('/artists/delete', methods=['POST'])
+def bulk_delete_artists():
+    """ Delete artists and their shows
+        - Request body: JSON with ids, a list of artist ids
+        - Returns: The ids of the deleted artists
+    """
+    payload = request.get_json(silent=True) or {}
+    return delete_records(Artist, payload.get('ids'))
+
+
+@main.route('/artists/<int:artist_id>/history')
+@main.route('/api/artists/<int:artist_id>/history',
+            endpoint='api_artist_history')
+@conditional('venues', 'artists', 'shows')
+def artist_history(artist_id):
+    return show_history(Artist, artist_id)
+
+
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@main.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+    from forms import EditArtistForm
     try:
         artist = Artist.query.get(artist_id)
-        form = ArtistForm(
+        form = EditArtistForm(
             name=artist.name,
             city=artist.city,
             state=artist.state,
@@ -399,6 +1698,7 @@ def edit_artist(artist_id):
             image_link=artist.image_link,
             genres=artist.genres,
             facebook_link=artist.facebook_link,
+            version=artist.version,
         )
     except:
         abort(500)
@@ -407,34 +1707,50 @@ def edit_artist(artist_id):
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@main.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
-    form = ArtistForm()
+    from forms import EditArtistForm
+    form = EditArtistForm()
     if not form.validate_on_submit():
         flash(f'An error occurred. Artist could not be updated.', 'error')
-        return redirect(url_for('show_artist', artist_id=artist_id))
+        return redirect(url_for('.show_artist', artist_id=artist_id))
 
     try:
-        artist = Artist.query.get(artist_id)
-        for key in form.data:
-            if form.data.get(key) is not None:
-                setattr(artist, key, form.data.get(key))
-        db.session.commit()
-        flash(f'Artist {artist.name} was successfully updated!')
+        changed = Artist.update_changed(
+            artist_id, form.data, version=form.version.data)
+        if changed:
+            db.session.commit()
+            if 'name' in changed:
+                name_index.add('artists', artist_id, form.name.data)
+            if {'name', 'image_link'} & set(changed):
+                cache.delete(*Artist.cache_keys(artist_id))
+            else:
+                cache.delete(Artist.cache_key(artist_id))
+            flash(f'Artist {form.name.data} was successfully updated!')
+        else:
+            flash(f'Artist {form.name.data} has no changes to save.')
+    except EditConflict:
+        db.session.rollback()
+        flash(f'Artist {form.name.data} was changed by someone else meanwhile. '
+              'Please review the changes and edit it again.', 'error')
+    except LookupError:
+        db.session.rollback()
+        abort(404)
     except:
         db.session.rollback()
         abort(500)
     finally:
         db.session.close()
 
-    return redirect(url_for('show_artist', artist_id=artist_id))
+    return redirect(url_for('.show_artist', artist_id=artist_id))
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@main.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+    from forms import EditVenueForm
     try:
         venue = Venue.query.get(venue_id)
-        form = VenueForm(
+        form = EditVenueForm(
             name=venue.name,
             city=venue.city,
             state=venue.state,
@@ -443,6 +1759,7 @@ def edit_venue(venue_id):
             image_link=venue.image_link,
             genres=venue.genres,
             facebook_link=venue.facebook_link,
+            version=venue.version,
         )
     except:
         abort(500)
@@ -451,39 +1768,56 @@ def edit_venue(venue_id):
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@main.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
-    form = VenueForm()
+    from forms import EditVenueForm
+    form = EditVenueForm()
     if not form.validate_on_submit():
         flash(f'An error occurred. Venue could not be updated.', 'error')
-        return redirect(url_for('show_venue', venue_id=venue_id))
+        return redirect(url_for('.show_venue', venue_id=venue_id))
 
     try:
-        venue = Venue.query.get(venue_id)
-        for key in form.data:
-            if form.data.get(key) is not None:
-                setattr(venue, key, form.data.get(key))
-        db.session.commit()
-        flash(f'Venue {venue.name} was successfully updated!')
+        changed = Venue.update_changed(
+            venue_id, form.data, version=form.version.data)
+        if changed:
+            db.session.commit()
+            if 'name' in changed:
+                name_index.add('venues', venue_id, form.name.data)
+            if {'name', 'image_link'} & set(changed):
+                cache.delete(*Venue.cache_keys(venue_id))
+            else:
+                cache.delete(Venue.cache_key(venue_id))
+            flash(f'Venue {form.name.data} was successfully updated!')
+        else:
+            flash(f'Venue {form.name.data} has no changes to save.')
+    except EditConflict:
+        db.session.rollback()
+        flash(f'Venue {form.name.data} was changed by someone else meanwhile. '
+              'Please review the changes and edit it again.', 'error')
+    except LookupError:
+        db.session.rollback()
+        abort(404)
     except:
         db.session.rollback()
         abort(500)
     finally:
         db.session.close()
 
-    return redirect(url_for('show_venue', venue_id=venue_id))
+    return redirect(url_for('.show_venue', venue_id=venue_id))
 
 
 #  Create Artist
 #  ----------------------------------------------------------------
-@app.route('/artists/create', methods=['GET'])
+@main.route('/artists/create', methods=['GET'])
 def create_artist_form():
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
 
-@app.route('/artists/create', methods=['POST'])
+@main.route('/artists/create', methods=['POST'])
 def create_artist_submission():
+    from forms import ArtistForm
     form = ArtistForm()
     if not form.validate_on_submit():
         flash(f'An error occurred. Artist could not be listed.', 'error')
@@ -493,6 +1827,7 @@ def create_artist_submission():
         new_artist = Artist.from_dict(form.data)
         db.session.add(new_artist)
         db.session.commit()
+        name_index.add('artists', new_artist.id, new_artist.name)
         flash(f'Artist {new_artist.name} was successfully listed!')
     except Exception as e:
         print(e)
@@ -505,27 +1840,43 @@ def create_artist_submission():
 
 #  Shows
 #  ----------------------------------------------------------------
-@app.route('/shows')
+@main.route('/shows')
+@main.route('/api/shows', endpoint='api_shows')
+@conditional('venues', 'artists', 'shows')
 def shows():
+    if wants_json():
+        return stream_json(
+            Show.listing_query().order_by(Show.start_time, Show.id),
+            Show.serialize_listing_row
+        )
+
+    cursor = request.args.get('cursor')
     try:
-        shows = Show.query.all()
-        serialized = [show.serialize for show in shows]
+        page = Show.listing(
+            cursor=cursor,
+            per_page=current_app.config.get('LISTING_PER_PAGE'),
+            chunk_size=current_app.config.get('STREAM_CHUNK_SIZE', 1000)
+        )
+    except InvalidCursor:
+        abort(400)
     except:
         abort(500)
     finally:
         db.session.close()
-    return render_template('pages/shows.html', shows=serialized)
+    return stream_template('pages/shows.html', shows=page.items, page=page)
 
 
-@app.route('/shows/create')
+@main.route('/shows/create')
 def create_shows():
+    from forms import ShowForm
     # renders form. do not touch.
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
 
-@app.route('/shows/create', methods=['POST'])
+@main.route('/shows/create', methods=['POST'])
 def create_show_submission():
+    from forms import ShowForm
     form = ShowForm()
     if not form.validate_on_submit():
         flash(f'An error occurred. Show could not be listed.', 'error')
@@ -533,11 +1884,23 @@ def create_show_submission():
 
     try:
         new_show = Show.from_dict(form.data)
-        print(new_show.id)
+        if Show.conflicts(
+            new_show.start_time,
+            venue_id=int(new_show.venue_id),
+            artist_id=int(new_show.artist_id)
+        ):
+            flash('An error occurred. The venue or the artist is already '
+                  'booked at that time.', 'error')
+            return render_template('pages/home.html')
         db.session.add(new_show)
         db.session.commit()
+        cache.delete(
+            Venue.cache_key(new_show.venue_id),
+            Artist.cache_key(new_show.artist_id)
+        )
         flash('Show was successfully listed!')
     except Exception as e:
+        db.session.rollback()
         print(e)
         flash('An error occurred. Show could not be listed.')
     finally:
@@ -546,26 +1909,413 @@ def create_show_submission():
     return render_template('pages/home.html')
 
 
-@app.errorhandler(404)
+def booked_shows(venue_id, artist_id, start_times):
+    """ Return the shows of the venue or the artist overlapping any of
+    `start_times`, serialized"""
+    conflicts = Show.conflicts(
+        start_times[0],
+        end=start_times[-1] + Show.duration,
+        venue_id=venue_id,
+        artist_id=artist_id
+    )
+    return [
+        show.serialize for show in conflicts
+        if any(abs(show.start_time - t) < Show.duration for t in start_times)
+    ]
+
+
+def already_booked(booked):
+    """ Answer a request booking the shows of `booked` again"""
+    return jsonify({
+        'status': 'failed',
+        'message': 'The venue or the artist is already booked',
+        'conflicts': booked
+    }), 409
+
+
+@main.route('/shows/schedule', methods=['POST'])
+def schedule_shows():
+    """ Schedule a batch of shows of an artist at a venue in one transaction
+
+    - Request body: JSON with artist_id, venue_id and either start_times,
+      a list of ISO 8601 datetimes, or rule, an RFC 5545 recurrence rule
+      repeating from dtstart
+    - Returns: The scheduled start times
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        artist_id = int(payload['artist_id'])
+        venue_id = int(payload['venue_id'])
+        start_times = expand_schedule(
+            start_times=payload.get('start_times'),
+            rule=payload.get('rule'),
+            dtstart=payload.get('dtstart'),
+            max_count=current_app.config.get('SHOW_SCHEDULE_MAX', 500),
+            min_gap=Show.duration
+        )
+    except KeyError as e:
+        return jsonify({
+            'status': 'failed',
+            'message': f'{e.args[0]} is required'
+        }), 400
+    except (TypeError, ValueError, OverflowError) as e:
+        return jsonify({'status': 'failed', 'message': str(e)}), 400
+
+    try:
+        if Artist.query.get(artist_id) is None or \
+                Venue.query.get(venue_id) is None:
+            return jsonify({
+                'status': 'failed',
+                'message': 'Unknown artist or venue'
+            }), 404
+        booked = booked_shows(venue_id, artist_id, start_times)
+        if booked:
+            return already_booked(booked)
+        Show.bulk_create(artist_id, venue_id, start_times)
+        db.session.commit()
+        cache.delete(Venue.cache_key(venue_id), Artist.cache_key(artist_id))
+    except IntegrityError as e:
+        db.session.rollback()
+        # Another request booked the slot since the check above
+        if getattr(e.orig, 'pgcode', None) != EXCLUSION_VIOLATION:
+            abort(500)
+        return already_booked(
+            booked_shows(venue_id, artist_id, start_times))
+    except:
+        db.session.rollback()
+        abort(500)
+    finally:
+        db.session.close()
+
+    return jsonify({
+        'status': 'success',
+        'count': len(start_times),
+        'start_times': [
+            t.replace(tzinfo=timezone.utc).isoformat() for t in start_times
+        ]
+    }), 201
+
+
+@main.route('/genres')
+def genres():
+    """ Count venues and artists per genre
+        - Returns: Genre facets of venues and of artists
+    """
+    try:
+        data = {
+            'venues': Venue.genre_facets(),
+            'artists': Artist.genre_facets()
+        }
+    except:
+        abort(500)
+    finally:
+        db.session.close()
+    return jsonify(data)
+
+
+@main.route('/shows/availability')
+def show_availability():
+    """ Tell whether a venue and/or an artist are free to book a show
+
+    - Query Params: venue_id, artist_id, start (ISO 8601), end (optional,
+      defaults to the duration of one show)
+    - Returns: Availability of each party and the conflicting shows
+    """
+    venue_id = request.args.get('venue_id', type=int)
+    artist_id = request.args.get('artist_id', type=int)
+    if (venue_id is None and artist_id is None) or \
+            (venue_id is None and 'venue_id' in request.args) or \
+            (artist_id is None and 'artist_id' in request.args):
+        return jsonify({
+            'status': 'failed',
+            'message': 'venue_id or artist_id must be given as an integer'
+        }), 400
+    try:
+        start = to_naive_utc(parse_datetime(request.args['start']))
+        end = request.args.get('end')
+        end = to_naive_utc(parse_datetime(end)) if end else None
+    except (KeyError, ValueError, OverflowError):
+        return jsonify({
+            'status': 'failed',
+            'message': 'start and end must be ISO 8601 datetimes'
+        }), 400
+    if end is not None and end <= start:
+        return jsonify({
+            'status': 'failed',
+            'message': 'end must be after start'
+        }), 400
+
+    try:
+        conflicts = Show.conflicts(
+            start, end=end, venue_id=venue_id, artist_id=artist_id)
+        data = {
+            'status': 'success',
+            'venue_available': None if venue_id is None else not any(
+                show.venue_id == venue_id for show in conflicts),
+            'artist_available': None if artist_id is None else not any(
+                show.artist_id == artist_id for show in conflicts),
+            'conflicts': [show.serialize for show in conflicts]
+        }
+    except:
+        abort(500)
+    finally:
+        db.session.close()
+    return jsonify(data)
+
+
+@main.route('/autocomplete')
+def autocomplete():
+    """ Suggest venue and artist names starting with a prefix
+        - Query parameters: q, the prefix; type, venues or artists (optional);
+          limit (optional)
+        - Returns: The matching names with their type and id
+    """
+    kind = request.args.get('type')
+    if kind not in (None, 'venues', 'artists'):
+        abort(400)
+    limit = min(
+        request.args.get('limit', 10, type=int),
+        current_app.config.get('AUTOCOMPLETE_MAX_RESULTS', 50)
+    )
+    try:
+        refresh_name_index()
+    except:
+        abort(500)
+    results = name_index.search(request.args.get('q', ''), kind, limit)
+    return jsonify({
+        'data': [
+            {'type': kind, 'id': id, 'name': name}
+            for kind, id, name in results
+        ]
+    })
+
+
+@main.before_app_first_request
+def warm_name_index():
+    # In the background, so as not to hold up the first response
+    load_name_index_in_background()
+
+
+@main.route('/cache/stats')
+@internal
+def cache_stats():
+    return jsonify(cache.stats)
+
+
+@main.route('/db/pool')
+@internal
+def db_pool_stats():
+    return jsonify(pool_stats(db.engine.pool))
+
+
+@main.app_errorhandler(400)
+def bad_request_error(error):
+    if wants_json():
+        return jsonify({'status': 'failed', 'message': 'Bad Request'}), 400
+    return error
+
+
+@main.app_errorhandler(404)
 def not_found_error(error):
+    if wants_json():
+        return jsonify({'status': 'failed', 'message': 'Not Found'}), 404
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
+    if wants_json():
+        return jsonify({
+            'status': 'failed',
+            'message': 'Internal Server Error'
+        }), 500
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context,
+                      executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+        g.query_time += time.perf_counter() - conn.info['query_started']
+
+
+@main.before_app_request
+def start_request_log():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+
+
+@main.after_app_request
+def log_request(response):
+    """ Log each request with its route, status, latency and queries when
+    `configure_logging` set up the JSON log, report the timings in a
+    Server-Timing header, and warn when the number of queries is over
+    QUERY_BUDGET
+
+    Streamed responses are measured when their headers are ready.
+    """
+    if 'request_started' not in g:
+        return response
+
+    latency = (time.perf_counter() - g.request_started) * 1000
+    query_time = g.query_time * 1000
+    route = request.url_rule.rule if request.url_rule else None
+    response.headers['Server-Timing'] = (
+        f'db;dur={query_time:.2f};desc="{g.query_count} queries", '
+        f'app;dur={latency:.2f}'
     )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
+    if 'request_log' in current_app.extensions:
+        current_app.logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'route': route,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': round(latency, 2),
+                'queries': g.query_count,
+                'query_time_ms': round(query_time, 2),
+            }
+        )
+    budget = current_app.config.get('QUERY_BUDGET')
+    if budget and g.query_count > budget:
+        current_app.logger.warning(
+            '%s %s ran %d queries, over the budget of %d',
+            request.method, route, g.query_count, budget,
+            extra={'route': route, 'queries': g.query_count}
+        )
+    return response
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+IMPORTABLE = {
+    'venues': (Venue, 'VenueForm'),
+    'artists': (Artist, 'ArtistForm'),
+    'shows': (Show, 'ShowForm'),
+}
+
+
+@main.cli.command('archive-shows')
+@click.option('--days', type=int, default=None,
+              help='Archive shows older than this many days '
+                   '(default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=10000, show_default=True,
+              help='Number of shows moved per transaction.')
+def archive_shows_command(days, batch_size):
+    """Move long past shows from the shows table to its archive.
+
+    Run it daily, e.g. from cron.
+    """
+    if days is None:
+        days = current_app.config.get('ARCHIVE_AFTER_DAYS', 365)
+    before = datetime.now() - timedelta(days=days)
+    try:
+        moved = ArchivedShow.archive(before, batch_size=batch_size)
+        invalidate_detail_cache()
+    except:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    click.echo(f'{moved} shows archived')
+
+
+@main.cli.command('refresh-stats')
+@click.option('--rebuild', is_flag=True,
+              help='Recompute all the statistics from the shows table.')
+def refresh_stats_command(rebuild):
+    """Move past shows out of the upcoming show statistics.
+
+    Run it every minute or so, e.g. from cron, to keep the upcoming show
+    counts of listings current.
+    """
+    try:
+        if rebuild:
+            cutoff = ShowStatsCutoff.rebuild()
+        else:
+            cutoff = ShowStatsCutoff.advance()
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+    click.echo(f'Show statistics are current as of {cutoff.isoformat()}')
+
+
+@main.cli.command('pool-stats')
+@click.option('--url', default='http://localhost:5000',
+              help='Base URL of the running server.')
+def pool_stats_command(url):
+    """Print the connection pool statistics of a running server."""
+    from urllib.request import Request, urlopen
+    token = current_app.config.get('INTERNAL_STATS_TOKEN')
+    if not token:
+        raise click.ClickException(
+            'INTERNAL_STATS_TOKEN must be set, as it is for the server')
+    pool_request = Request(f'{url.rstrip("/")}/db/pool',
+                           headers={'Authorization': f'Bearer {token}'})
+    with urlopen(pool_request) as response:
+        stats = json.load(response)
+    for key, value in stats.items():
+        click.echo(f'{key}: {value}')
+
+
+@main.cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORTABLE)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+              help='Input format, guessed from the file extension if omitted.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Number of records inserted per transaction.')
+@click.option('--rejects', type=click.Path(dir_okay=False),
+              help='JSON Lines file for rejected records '
+                   '[default: PATH.rejected.jsonl]')
+def import_data(kind, path, file_format, batch_size, rejects):
+    """Stream venues, artists or shows from a CSV or JSON Lines file."""
+    import forms
+    model, form_name = IMPORTABLE[kind]
+    form_class = getattr(forms, form_name)
+    file_format = file_format or (
+        'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    rejects = rejects or f'{path}.rejected.jsonl'
+
+    with open(path, newline='') as f, open(rejects, 'w') as rejects_file, \
+            current_app.test_request_context(), \
+            db.engine.connect() as connection:
+        def on_reject(row, errors):
+            rejects_file.write(
+                json.dumps({'row': row, 'errors': errors}, default=str) + '\n')
+
+        def on_progress(imported, rejected):
+            click.echo(f'{kind}: {imported} imported, {rejected} rejected')
+
+        importer = Importer(
+            model.__table__,
+            form_class,
+            batch_size=batch_size,
+            on_reject=on_reject,
+            on_progress=on_progress
+        )
+        imported, rejected = importer.run(
+            connection, read_rows(f, file_format))
+
+    try:
+        invalidate_detail_cache()
+    finally:
+        db.session.close()
+    click.echo(f'Done: {imported} {kind} imported, {rejected} rejected')
+    if rejected:
+        click.echo(f'Rejected records were written to {rejects}')
 
 
 #----------------------------------------------------------------------------#
@@ -573,11 +2323,11 @@ if not app.debug:
 #----------------------------------------------------------------------------#
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
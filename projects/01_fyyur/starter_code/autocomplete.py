@@ -0,0 +1,89 @@
+import bisect
+import threading
+import time
+
+
+def normalize(text):
+    """Return `text` as compared by the index: case folded, with single
+    spaces between words"""
+    return ' '.join((text or '').casefold().split())
+
+
+class PrefixIndex:
+    """In-memory index of names searched by prefix
+
+    Every name is stored once for each of its words, so a prefix matches the
+    start of any word. Keys are kept in a sorted array, so a lookup is a
+    bisection followed by a scan of the matching keys only.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._names = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    @staticmethod
+    def _keys_for(kind, id, name):
+        words = normalize(name).split(' ')
+        return [(' '.join(words[i:]), kind, id) for i in range(len(words))]
+
+    def build(self, records):
+        """Replace the contents of the index with `records`, an iterable of
+        (kind, id, name)"""
+        names = {}
+        keys = []
+        for kind, id, name in records:
+            names[kind, id] = name
+            keys.extend(self._keys_for(kind, id, name))
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._names = names
+            self.built_at = time.monotonic()
+
+    def add(self, kind, id, name):
+        """Add a record, or replace its name if it is already indexed"""
+        with self._lock:
+            self._remove(kind, id)
+            self._names[kind, id] = name
+            for key in self._keys_for(kind, id, name):
+                bisect.insort(self._keys, key)
+
+    def remove(self, kind, id):
+        with self._lock:
+            self._remove(kind, id)
+
+    def _remove(self, kind, id):
+        name = self._names.pop((kind, id), None)
+        if name is None:
+            return
+        for key in self._keys_for(kind, id, name):
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def search(self, prefix, kind=None, limit=10):
+        """Return up to `limit` (kind, id, name) records with a word starting
+        with `prefix`, optionally of one `kind` only"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and len(results) < limit:
+                key, key_kind, id = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                i += 1
+                if (kind is None or key_kind == kind) and \
+                        (key_kind, id) not in seen:
+                    seen.add((key_kind, id))
+                    results.append((key_kind, id, self._names[key_kind, id]))
+        return results
+
+    def is_stale(self, max_age):
+        return self.built_at is None or \
+            time.monotonic() - self.built_at > max_age
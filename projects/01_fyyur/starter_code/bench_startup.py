@@ -0,0 +1,67 @@
+"""Measure the cold start of the application: each run starts a fresh
+interpreter, imports the app, creates it and serves a first request
+
+Usage: python bench_startup.py [--runs N] [--path PATH]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+PROBE = '''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(migrations=False)
+created = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+response.get_data()
+done = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import': imported - start,
+    'create_app': created - imported,
+    'first_response': done - created,
+}))
+'''
+
+PHASES = ('process', 'import', 'create_app', 'first_response')
+
+
+def run(path):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    timings = json.loads(output.splitlines()[-1])
+    timings['process'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/',
+                        help='Path of the first request (default: /)')
+    args = parser.parse_args()
+
+    results = [run(args.path) for _ in range(args.runs)]
+    statuses = {result['status'] for result in results}
+    print(f'{args.runs} runs of GET {args.path}, status {statuses}')
+    print(f'{"phase":<16}{"min ms":>10}{"median ms":>12}{"max ms":>10}')
+    for phase in PHASES:
+        times = [result[phase] * 1000 for result in results]
+        print(f'{phase:<16}{min(times):>10.1f}'
+              f'{statistics.median(times):>12.1f}{max(times):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
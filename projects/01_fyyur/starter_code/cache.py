@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class NullBackend:
+    """Backend that never stores anything, which disables caching"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUBackend:
+    """In-process least recently used cache, private to each worker"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend:
+    """Cache kept as JSON files in a local directory, shared by every
+    worker process on the host"""
+
+    def __init__(self, directory, ttl=None):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if item['expires'] is not None and item['expires'] < time.time():
+            self.delete(key)
+            return None
+        return item['value']
+
+    def set(self, key, value):
+        item = {
+            'expires': time.time() + self.ttl if self.ttl else None,
+            'value': value
+        }
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(item, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            os.unlink(tmp)
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.unlink(os.path.join(self.directory, name))
+
+
+class Cache:
+    """Read-through cache for serialized payloads
+
+    The backend is picked by the CACHE_BACKEND setting: 'lru' (default),
+    'filesystem' or 'null'. Hit and miss counters are kept per process.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.backend_name = 'null'
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get('CACHE_BACKEND', 'lru')
+        ttl = app.config.get('CACHE_TTL')
+        if name == 'lru':
+            self.backend = LRUBackend(
+                maxsize=app.config.get('CACHE_MAXSIZE', 1024), ttl=ttl)
+        elif name == 'filesystem':
+            self.backend = FileSystemBackend(
+                app.config.get('CACHE_DIR')
+                or os.path.join(app.instance_path, 'cache'),
+                ttl=ttl
+            )
+        elif name == 'null':
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND: {name}')
+        self.backend_name = name
+        app.extensions['cache'] = self
+
+    def get_or_set(self, key, loader, generation=None):
+        """Return the cached value of `key`, calling `loader` to compute and
+        store it on a miss
+
+        A value stored under another `generation` counts as a miss, so that
+        bumping the generation invalidates every entry at once, in every
+        process sharing the source of the generation.
+        """
+        item = self.backend.get(key)
+        hit = item is not None and item['generation'] == generation
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return item['value']
+        value = loader()
+        self.backend.set(key, {'generation': generation, 'value': value})
+        return value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend_name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else None
+        }
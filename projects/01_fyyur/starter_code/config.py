@@ -1,9 +1,13 @@
 import os
 from dotenv import load_dotenv
 
+from pool import engine_options
+
 
 load_dotenv()
-SECRET_KEY = os.urandom(32)
+# Shared by every worker so that sessions stay valid across them. When unset,
+# a key is generated once and kept in the instance folder.
+SECRET_KEY = os.getenv("SECRET_KEY")
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -13,3 +17,80 @@ DEBUG = True
 # Connect to the database
 # SQLALCHEMY_DATABASE_URI = '<Put your local database url>'
 SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
+
+# Connection pool of each worker: SQLAlchemy's default size, overflow and
+# timeout, with connections recycled after 30 minutes and checked before use.
+# Timeouts and recycle age are in seconds, the statement timeout in
+# milliseconds (0: none)
+SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+    SQLALCHEMY_DATABASE_URI,
+    pool_size=int(os.getenv("DATABASE_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", 10)),
+    pool_timeout=int(os.getenv("DATABASE_POOL_TIMEOUT", 30)),
+    pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", 1800)),
+    pool_pre_ping=os.getenv("DATABASE_POOL_PRE_PING", "1") == "1",
+    statement_timeout=int(os.getenv("DATABASE_STATEMENT_TIMEOUT", 0)),
+)
+
+# Number of past shows listed on venue and artist pages (unset: all of them)
+PAST_SHOWS_LIMIT = int(os.getenv("PAST_SHOWS_LIMIT") or 0) or None
+
+# Number of city/state groups per page of /venues
+VENUE_AREAS_PER_PAGE = int(os.getenv("VENUE_AREAS_PER_PAGE", 20))
+
+# Number of rows per page of /artists and /shows, 0 streams every row on a
+# single page
+LISTING_PER_PAGE = int(os.getenv("LISTING_PER_PAGE", 50))
+
+# Number of results per page of venue and artist searches
+SEARCH_RESULTS_PER_PAGE = int(os.getenv("SEARCH_RESULTS_PER_PAGE", 20))
+
+# Cache for venue and artist detail pages: 'lru', 'filesystem' or 'null'
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "lru")
+CACHE_TTL = int(os.getenv("CACHE_TTL", 300)) or None
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", 1024))
+CACHE_DIR = os.getenv("CACHE_DIR")
+
+# Seconds for which ETag/Last-Modified values of pages stay valid when no
+# table they depend on changes; upcoming shows turn into past ones meanwhile
+CONDITIONAL_GET_WINDOW = int(os.getenv("CONDITIONAL_GET_WINDOW", 300))
+
+# Maximum number of shows created by one scheduling request
+SHOW_SCHEDULE_MAX = int(os.getenv("SHOW_SCHEDULE_MAX", 500))
+
+# Maximum number of venues or artists removed by one bulk delete
+BULK_DELETE_MAX = int(os.getenv("BULK_DELETE_MAX", 10000))
+
+# Number of rows fetched and sent per chunk when streaming listings
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1000))
+
+# Number of template parts buffered before each write of a streamed page
+STREAM_TEMPLATE_BUFFER = int(os.getenv("STREAM_TEMPLATE_BUFFER", 5))
+
+# Log file written outside debug mode by every worker. It is reopened when
+# moved away, so rotate it with logrotate or the like.
+LOG_FILE = os.getenv("LOG_FILE", "error.log")
+
+# Records waiting for the log writer thread beyond which new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Bearer token required by /db/pool and /cache/stats, which answer 404 when
+# it is unset. `flask pool-stats` sends it.
+INTERNAL_STATS_TOKEN = os.getenv("INTERNAL_STATS_TOKEN") or None
+
+# Number of SQL queries per request above which a warning is logged
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 10))
+
+# Seconds between background rebuilds of the autocomplete index, and the
+# largest number of suggestions returned at once
+AUTOCOMPLETE_REFRESH = int(os.getenv("AUTOCOMPLETE_REFRESH", 300))
+AUTOCOMPLETE_MAX_RESULTS = int(os.getenv("AUTOCOMPLETE_MAX_RESULTS", 50))
+
+# Age in days after which `flask archive-shows` moves shows to the archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 365))
+
+# Largest number of artists recommended for a venue, and the share of the
+# score that comes from the venue's shows rather than its own genres
+RECOMMENDATIONS_LIMIT = int(os.getenv("RECOMMENDATIONS_LIMIT", 20))
+RECOMMENDATION_HISTORY_WEIGHT = float(
+    os.getenv("RECOMMENDATION_HISTORY_WEIGHT", 0.5))
@@ -0,0 +1,9 @@
+class EditConflict(Exception):
+    """Raised when a record changed since the editor loaded it"""
+    pass
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or does not fit the
+    sort key of the listing"""
+    pass
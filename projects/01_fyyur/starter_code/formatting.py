@@ -0,0 +1,52 @@
+import functools
+from datetime import datetime, timezone
+
+
+PATTERNS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pattern(format):
+    """Return the parsed Babel pattern named or spelled out by `format`"""
+    # Babel and dateutil are imported on first use, as they are slow to load
+    # and many processes never format or parse a date
+    import babel.dates
+    return babel.dates.parse_pattern(PATTERNS.get(format, format))
+
+
+@functools.lru_cache(maxsize=None)
+def get_locale(locale=None):
+    import babel.dates
+    return babel.Locale.parse(locale or babel.dates.LC_TIME)
+
+
+def parse_datetime(value):
+    """Return `value` as a datetime
+
+    datetime objects pass straight through and ISO 8601 strings, such as
+    those of `Show.serialize`, take the fast standard library path. Any
+    other string falls back to dateutil.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+@functools.lru_cache(maxsize=4096)
+def format_datetime(value, format='medium'):
+    """Format a datetime or date string the way Babel's format_datetime
+    does, memoized by value and format
+
+    Naive datetimes are taken to be in UTC.
+    """
+    date = parse_datetime(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return compile_pattern(format).apply(date, get_locale())
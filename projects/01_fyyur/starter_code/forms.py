@@ -1,40 +1,14 @@
 from datetime import datetime
-from enum import Enum
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
+from wtforms import (
+    StringField, SelectField, SelectMultipleField, DateTimeField, IntegerField
+)
 from wtforms.validators import AnyOf, DataRequired, Optional, Regexp, URL
+from wtforms.widgets import HiddenInput
 
-PHONE_NUMBER_REGEX = '^[+]*[(]{0,1}[0-9]{1,4}[)]{0,1}[-\s\./0-9]*$'
-
-
-class Genre(Enum):
-    ALTERNATIVE = 'Alternative'
-    BLUES = 'Blues'
-    CLASSICAL = 'Classical'
-    COUNTRY = 'Country'
-    ELECTRONIC = 'Electronic'
-    FOLK = 'Folk'
-    FUNK = 'Funk'
-    HIP_HOP = 'Hip-Hop'
-    HEAVY_METAL = 'Heavy Metal'
-    INSTRUMENTAL = 'Instrumental'
-    JAZZ = 'Jazz'
-    MUSICAL_THEATRE = 'Musical Theatre'
-    POP = 'Pop'
-    PUNK = 'Punk'
-    R_N_B = 'R&B'
-    REGGAE = 'Reggae'
-    ROCK_N_ROLL = 'Rock n Roll'
-    SOUL = 'Soul'
-    OTHER = 'Other'
+from genres import Genre
 
-    @classmethod
-    def generate_options(cls):
-        return [(g.value, g.value) for g in cls]
-
-    @classmethod
-    def validate(cls, form, field):
-        return set(field.data).issubset(set([g.value for g in cls]))
+PHONE_NUMBER_REGEX = '^[+]*[(]{0,1}[0-9]{1,4}[)]{0,1}[-\s\./0-9]*$'
 
 
 STATE_CHOICES = [
@@ -182,4 +156,20 @@ class ArtistForm(FlaskForm):
         validators=[URL(), Optional()]
     )
 
+
+class EditVenueForm(VenueForm):
+    version = IntegerField(
+        'version',
+        validators=[Optional()],
+        widget=HiddenInput()
+    )
+
+
+class EditArtistForm(ArtistForm):
+    version = IntegerField(
+        'version',
+        validators=[Optional()],
+        widget=HiddenInput()
+    )
+
 # TODO IMPLEMENT NEW ARTIST FORM AND NEW SHOW FORM
@@ -0,0 +1,38 @@
+from enum import Enum
+
+
+class Genre(Enum):
+    # Each genre is a bit of the genre_mask database function, in
+    # definition order, which `from_mask` mirrors: add new genres at the end.
+    ALTERNATIVE = 'Alternative'
+    BLUES = 'Blues'
+    CLASSICAL = 'Classical'
+    COUNTRY = 'Country'
+    ELECTRONIC = 'Electronic'
+    FOLK = 'Folk'
+    FUNK = 'Funk'
+    HIP_HOP = 'Hip-Hop'
+    HEAVY_METAL = 'Heavy Metal'
+    INSTRUMENTAL = 'Instrumental'
+    JAZZ = 'Jazz'
+    MUSICAL_THEATRE = 'Musical Theatre'
+    POP = 'Pop'
+    PUNK = 'Punk'
+    R_N_B = 'R&B'
+    REGGAE = 'Reggae'
+    ROCK_N_ROLL = 'Rock n Roll'
+    SOUL = 'Soul'
+    OTHER = 'Other'
+
+    @classmethod
+    def generate_options(cls):
+        return [(g.value, g.value) for g in cls]
+
+    @classmethod
+    def validate(cls, form, field):
+        return set(field.data).issubset(set([g.value for g in cls]))
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Decode a bit vector into genre names"""
+        return [g.value for i, g in enumerate(cls) if mask >> i & 1]
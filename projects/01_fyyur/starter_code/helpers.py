@@ -1,21 +1,39 @@
-import functools
+import itertools
+import re
 
 
-def aggregate_venues(venues):
-    d = functools.reduce(from_list_to_dict, venues, {})
+LOCATION_PATTERN = re.compile(r'^\s*([^,]+?)\s*,\s*([A-Za-z]{2})\s*$')
+
+
+def aggregate_venues(rows):
+    """Group venue rows, already ordered by area, into one entry per
+    city/state pair"""
     return [
         {
-            'city': k.split('|')[0],
-            'state': k.split('|')[1],
-            'venues': d[k]
-        } for k in d
+            'city': city,
+            'state': state,
+            'venues': [
+                {
+                    'id': row.id,
+                    'name': row.name,
+                    'num_upcoming_shows': row.num_upcoming_shows
+                } for row in venues
+            ]
+        } for (city, state), venues in itertools.groupby(
+            rows, key=lambda row: (row.city, row.state))
     ]
 
 
-def from_list_to_dict(a, c):
-    try:
-        a[f'{c["city"]}|{c["state"]}'].append(c)
-    except:
-        a[f'{c["city"]}|{c["state"]}'] = []
-        a[f'{c["city"]}|{c["state"]}'].append(c)
-    return a
+def escape_like(text):
+    """Escape the wildcards of `text` for a LIKE pattern, with backslash as
+    the escape character"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def split_location(text):
+    """Return (city, state) if `text` reads like "San Francisco, CA", or
+    else None"""
+    match = LOCATION_PATTERN.match(text or '')
+    if match is None:
+        return None
+    return match.group(1), match.group(2).upper()
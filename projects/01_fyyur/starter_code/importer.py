@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import DBAPIError
+from werkzeug.datastructures import MultiDict
+
+
+def read_rows(f, file_format):
+    """Yield the records of a CSV or JSON Lines file one at a time
+
+    In CSV files, list fields such as genres are comma separated.
+    """
+    if file_format == 'csv':
+        for row in csv.DictReader(f):
+            yield row
+    elif file_format == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f'Unknown file format: {file_format}')
+
+
+def to_formdata(row, list_fields=()):
+    """Return a record as form data that WTForms can validate"""
+    formdata = MultiDict()
+    for key, value in row.items():
+        if value is None:
+            continue
+        if key in list_fields and isinstance(value, str):
+            value = [v.strip() for v in value.split(',') if v.strip()]
+        if isinstance(value, (list, tuple)):
+            for v in value:
+                formdata.add(key, str(v))
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+def to_copy_value(value):
+    """Return a value in the text form COPY ... (FORMAT csv) expects"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return '{' + ','.join(
+            '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"'
+            for v in value
+        ) + '}'
+    return str(value)
+
+
+def error_message(error):
+    """Return the message of a database error, raised by SQLAlchemy or by
+    the driver"""
+    return str(getattr(error, 'orig', error)).strip()
+
+
+class Importer:
+    """Validate records with a form and insert them in batches
+
+    Each batch is inserted in its own transaction, with COPY on PostgreSQL
+    and an executemany INSERT elsewhere. When a batch fails, its rows are
+    retried one by one, each in a savepoint, so only the offending rows are
+    rejected. Memory use is bounded by the batch size, whatever the input
+    size.
+    """
+
+    def __init__(self, table, form_class, batch_size=1000, on_reject=None,
+                 on_progress=None):
+        self.table = table
+        self.form_class = form_class
+        self.batch_size = batch_size
+        self.on_reject = on_reject or (lambda row, errors: None)
+        self.on_progress = on_progress or (lambda imported, rejected: None)
+        self.columns = [c for c in table.columns if not c.primary_key]
+        self.imported = 0
+        self.rejected = 0
+
+    def validate(self, row):
+        """Return (column values, None) for a valid record, or
+        (None, errors) for an invalid one"""
+        list_fields = [c.name for c in self.columns
+                       if getattr(c.type, 'item_type', None) is not None]
+        form = self.form_class(
+            formdata=to_formdata(row, list_fields), meta={'csrf': False})
+        if not form.validate():
+            return None, form.errors
+
+        values = {}
+        try:
+            for column in self.columns:
+                if column.name in form.data:
+                    value = form.data[column.name]
+                    if value is not None and column.type.python_type is int:
+                        value = int(value)
+                elif column.default is not None and column.default.is_scalar:
+                    value = column.default.arg
+                else:
+                    value = None
+                values[column.name] = value
+        except ValueError as e:
+            return None, {'_row': [str(e)]}
+        return values, None
+
+    def run(self, connection, rows):
+        """Import `rows` over `connection` and return (imported, rejected)"""
+        batch = []
+        for row in rows:
+            values, errors = self.validate(row)
+            if errors:
+                self.reject(row, errors)
+                continue
+            batch.append((row, values))
+            if len(batch) >= self.batch_size:
+                self.flush(connection, batch)
+                batch = []
+        if batch:
+            self.flush(connection, batch)
+        return self.imported, self.rejected
+
+    def reject(self, row, errors):
+        self.rejected += 1
+        self.on_reject(row, errors)
+
+    def flush(self, connection, batch):
+        # COPY goes through the driver's own cursor, whose errors SQLAlchemy
+        # does not wrap
+        errors = (DBAPIError, connection.dialect.dbapi.Error)
+        try:
+            with connection.begin():
+                self.insert(connection, [values for _, values in batch])
+            self.imported += len(batch)
+        except errors:
+            # Retry the rows one by one, each in a savepoint, so that only
+            # the offending ones are rejected
+            with connection.begin():
+                for row, values in batch:
+                    savepoint = connection.begin_nested()
+                    try:
+                        self.insert(connection, [values])
+                        savepoint.commit()
+                        self.imported += 1
+                    except errors as e:
+                        savepoint.rollback()
+                        self.reject(row, {'_row': [error_message(e)]})
+        self.on_progress(self.imported, self.rejected)
+
+    def insert(self, connection, records):
+        if connection.dialect.name != 'postgresql' or \
+                connection.dialect.driver != 'psycopg2':
+            connection.execute(self.table.insert(), records)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow(
+                [to_copy_value(record[c.name]) for c in self.columns])
+        buffer.seek(0)
+        columns = ', '.join(c.name for c in self.columns)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        finally:
+            cursor.close()
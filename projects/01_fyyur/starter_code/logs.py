@@ -0,0 +1,127 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+
+# Attributes every LogRecord has, as opposed to those passed with `extra`
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    'message', 'asctime'
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any fields
+    passed with `extra`"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        if record.levelno >= logging.WARNING:
+            data['location'] = f'{record.pathname}:{record.lineno}'
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full rather than
+    wait for the listener thread"""
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, since arguments may change
+        # before the listener gets to the record, but leave the formatting
+        # to the target handler
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def file_handler(path):
+    """Return a handler appending to `path`, which reopens the file when it
+    is moved away
+
+    Every worker of a server appends to the same file, so none of them may
+    rotate it: rotation is left to an outside tool such as logrotate.
+    """
+    return WatchedFileHandler(path)
+
+
+def queue_logging(logger, make_handler, queue_size=10000):
+    """Send the records of `logger` to a handler from a background thread
+
+    The logger only puts records on a bounded queue, so formatting and disk
+    writes never happen on the request path. `make_handler` returns the
+    handler, and is called again in forked processes, which start over with
+    a queue, handler and thread of their own. Calling it again for the same
+    logger replaces its queue. Returns the started listener.
+    """
+    stop_queue_logging(logger)
+    records = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(records)
+    listener = QueueListener(
+        records, make_handler(), respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _queues[logger] = (queue_handler, listener, make_handler)
+    return listener
+
+
+def stop_queue_logging(logger):
+    """Write the records queued for `logger`, then stop its thread"""
+    queue_handler, listener, _ = _queues.pop(logger, (None, None, None))
+    if listener is not None:
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _stop_all_queue_logging():
+    for logger in list(_queues):
+        stop_queue_logging(logger)
+
+
+def _restart_queue_logging_in_child():
+    # The listener threads do not survive a fork, and a queue copied while
+    # one of them held its lock would stay locked: leave the copies alone
+    for logger, (queue_handler, _, make_handler) in list(_queues.items()):
+        logger.removeHandler(queue_handler)
+        del _queues[logger]
+        queue_logging(logger, make_handler, queue_handler.queue.maxsize)
+
+
+# Queue handler, listener and handler factory of each queued logger
+_queues = {}
+atexit.register(_stop_all_queue_logging)
+os.register_at_fork(after_in_child=_restart_queue_logging_in_child)
@@ -0,0 +1,34 @@
+"""add search indexes
+
+Revision ID: 5e1d3a7c9b20
+Revises: c63bb0e3de4a
+Create Date: 2026-10-18 10:12:31.402115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1d3a7c9b20'
+down_revision = 'c63bb0e3de4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    for table in ('venues', 'artists'):
+        for column in ('name', 'city'):
+            op.create_index(f'ix_{table}_{column}_trgm', table, [column],
+                            postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'})
+        op.create_index(f'ix_{table}_genres', table, ['genres'],
+                        postgresql_using='gin')
+
+
+def downgrade():
+    for table in ('artists', 'venues'):
+        op.drop_index(f'ix_{table}_genres', table_name=table)
+        for column in ('city', 'name'):
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
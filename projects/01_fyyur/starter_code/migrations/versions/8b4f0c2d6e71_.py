@@ -0,0 +1,26 @@
+"""add listing pagination indexes
+
+Revision ID: 8b4f0c2d6e71
+Revises: 5e1d3a7c9b20
+Create Date: 2026-10-18 11:03:54.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4f0c2d6e71'
+down_revision = '5e1d3a7c9b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venues_state_city', 'venues', ['state', 'city'])
+    op.create_index('ix_shows_start_time_id', 'shows', ['start_time', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_shows_start_time_id', table_name='shows')
+    op.drop_index('ix_venues_state_city', table_name='venues')
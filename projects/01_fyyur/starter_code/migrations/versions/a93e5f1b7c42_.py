@@ -0,0 +1,55 @@
+"""add table versions for conditional requests
+
+Revision ID: a93e5f1b7c42
+Revises: 8b4f0c2d6e71
+Create Date: 2026-10-18 11:47:20.563901
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e5f1b7c42'
+down_revision = '8b4f0c2d6e71'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venues', 'artists', 'shows')
+
+
+def upgrade():
+    op.create_table('table_versions',
+                    sa.Column('table_name', sa.String(length=64),
+                              nullable=False),
+                    sa.Column('version', sa.BigInteger(), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('table_name')
+                    )
+    op.execute('''
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, timezone('utc', now()))
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_versions.version + 1,
+                updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    ''')
+    for table in TABLES:
+        op.execute(
+            f"INSERT INTO table_versions (table_name, version, updated_at) "
+            f"VALUES ('{table}', 1, timezone('utc', now()));")
+        op.execute(
+            f'CREATE TRIGGER {table}_bump_version '
+            f'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+            f'FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version();')
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER {table}_bump_version ON {table};')
+    op.execute('DROP FUNCTION bump_table_version();')
+    op.drop_table('table_versions')
@@ -0,0 +1,133 @@
+"""add show statistics maintained by a trigger
+
+Revision ID: b7d41e8c2a59
+Revises: f5b92c7d3e08
+Create Date: 2026-10-18 19:35:08.214630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e8c2a59'
+down_revision = 'f5b92c7d3e08'
+branch_labels = None
+depends_on = None
+
+STATS = (('venue_stats', 'venue_id', 'venues'),
+         ('artist_stats', 'artist_id', 'artists'))
+
+
+def remove_show(table, key):
+    return f'''
+            UPDATE {table} SET
+                past_shows_count = past_shows_count
+                    - (OLD.start_time < stats_cutoff)::int,
+                upcoming_shows_count = upcoming_shows_count
+                    - (OLD.start_time >= stats_cutoff)::int,
+                next_show_time = CASE
+                    WHEN next_show_time = OLD.start_time THEN (
+                        SELECT min(start_time) FROM shows
+                        WHERE shows.{key} = OLD.{key}
+                        AND start_time >= stats_cutoff)
+                    ELSE next_show_time END,
+                last_show_time = CASE
+                    WHEN last_show_time = OLD.start_time THEN (
+                        SELECT max(start_time) FROM shows
+                        WHERE shows.{key} = OLD.{key}
+                        AND start_time < stats_cutoff)
+                    ELSE last_show_time END
+            WHERE {key} = OLD.{key};'''
+
+
+def add_show(table, key):
+    return f'''
+            INSERT INTO {table} ({key}, past_shows_count,
+                upcoming_shows_count, next_show_time, last_show_time)
+            VALUES (
+                NEW.{key},
+                (NEW.start_time < stats_cutoff)::int,
+                (NEW.start_time >= stats_cutoff)::int,
+                CASE WHEN NEW.start_time >= stats_cutoff
+                    THEN NEW.start_time END,
+                CASE WHEN NEW.start_time < stats_cutoff
+                    THEN NEW.start_time END)
+            ON CONFLICT ({key}) DO UPDATE SET
+                past_shows_count = {table}.past_shows_count
+                    + EXCLUDED.past_shows_count,
+                upcoming_shows_count = {table}.upcoming_shows_count
+                    + EXCLUDED.upcoming_shows_count,
+                next_show_time = LEAST({table}.next_show_time,
+                                       EXCLUDED.next_show_time),
+                last_show_time = GREATEST({table}.last_show_time,
+                                          EXCLUDED.last_show_time);'''
+
+
+def upgrade():
+    for table, key, parent in STATS:
+        op.create_table(table,
+                        sa.Column(key, sa.Integer(), nullable=False),
+                        sa.Column('past_shows_count', sa.Integer(),
+                                  server_default='0', nullable=False),
+                        sa.Column('upcoming_shows_count', sa.Integer(),
+                                  server_default='0', nullable=False),
+                        sa.Column('next_show_time', sa.DateTime(),
+                                  nullable=True),
+                        sa.Column('last_show_time', sa.DateTime(),
+                                  nullable=True),
+                        sa.ForeignKeyConstraint([key], [f'{parent}.id'],
+                                                ondelete='CASCADE'),
+                        sa.PrimaryKeyConstraint(key)
+                        )
+    op.create_table('show_stats_cutoff',
+                    sa.Column('id', sa.Boolean(), nullable=False),
+                    sa.Column('cutoff', sa.DateTime(), nullable=False),
+                    sa.CheckConstraint('id'),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.execute('INSERT INTO show_stats_cutoff (id, cutoff) '
+               'VALUES (true, LOCALTIMESTAMP);')
+    for table, key, _ in STATS:
+        op.execute(f'''
+            INSERT INTO {table} ({key}, past_shows_count,
+                upcoming_shows_count, next_show_time, last_show_time)
+            SELECT {key},
+                count(*) FILTER (WHERE start_time < cutoff),
+                count(*) FILTER (WHERE start_time >= cutoff),
+                min(start_time) FILTER (WHERE start_time >= cutoff),
+                max(start_time) FILTER (WHERE start_time < cutoff)
+            FROM shows, show_stats_cutoff
+            GROUP BY {key};
+        ''')
+
+    # Shares the cutoff row so that shows written while the cutoff moves
+    # wait for it and are counted against the new cutoff
+    op.execute(f'''
+        CREATE FUNCTION update_show_stats() RETURNS trigger AS $$
+        DECLARE
+            stats_cutoff timestamp;
+        BEGIN
+            SELECT cutoff INTO stats_cutoff FROM show_stats_cutoff FOR SHARE;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {''.join(remove_show(table, key) for table, key, _ in STATS)}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {''.join(add_show(table, key) for table, key, _ in STATS)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    ''')
+    op.execute('CREATE TRIGGER shows_update_stats '
+               'AFTER INSERT OR DELETE OR UPDATE OF '
+               'venue_id, artist_id, start_time ON shows '
+               'FOR EACH ROW EXECUTE PROCEDURE update_show_stats();')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER shows_update_stats ON shows;')
+    op.execute('DROP FUNCTION update_show_stats();')
+    op.drop_table('show_stats_cutoff')
+    for table, _, _ in reversed(STATS):
+        op.drop_table(table)
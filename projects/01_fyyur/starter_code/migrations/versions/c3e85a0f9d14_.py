@@ -0,0 +1,64 @@
+"""add shows archive
+
+Revision ID: c3e85a0f9d14
+Revises: b7d41e8c2a59
+Create Date: 2026-10-18 20:02:41.730118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e85a0f9d14'
+down_revision = 'b7d41e8c2a59'
+branch_labels = None
+depends_on = None
+
+
+def create_stats_trigger(when=None):
+    op.execute('DROP TRIGGER shows_update_stats ON shows;')
+    op.execute('CREATE TRIGGER shows_update_stats '
+               'AFTER INSERT OR DELETE OR UPDATE OF '
+               'venue_id, artist_id, start_time ON shows '
+               'FOR EACH ROW '
+               + (f'WHEN ({when}) ' if when else '') +
+               'EXECUTE PROCEDURE update_show_stats();')
+
+
+def upgrade():
+    op.create_table('shows_archive',
+                    sa.Column('id', sa.Integer(), autoincrement=False,
+                              nullable=False),
+                    sa.Column('venue_id', sa.Integer(), nullable=False),
+                    sa.Column('artist_id', sa.Integer(), nullable=False),
+                    sa.Column('start_time', sa.DateTime(), nullable=False),
+                    sa.ForeignKeyConstraint(['artist_id'], ['artists.id'],
+                                            ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['venue_id'], ['venues.id'],
+                                            ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_shows_archive_venue_id_start_time', 'shows_archive',
+                    ['venue_id', 'start_time', 'id'], unique=False)
+    op.create_index('ix_shows_archive_artist_id_start_time', 'shows_archive',
+                    ['artist_id', 'start_time', 'id'], unique=False)
+    # Archived shows keep counting as past shows in the statistics
+    create_stats_trigger(
+        "current_setting('fyyur.archiving', true) IS DISTINCT FROM 'on'")
+
+
+def downgrade():
+    # Archived shows are already counted as past shows
+    op.execute("SET LOCAL fyyur.archiving = 'on';")
+    op.execute('''
+        INSERT INTO shows (id, venue_id, artist_id, start_time)
+        SELECT id, venue_id, artist_id, start_time FROM shows_archive;
+    ''')
+    op.execute("SET LOCAL fyyur.archiving = 'off';")
+    create_stats_trigger()
+    op.drop_index('ix_shows_archive_artist_id_start_time',
+                  table_name='shows_archive')
+    op.drop_index('ix_shows_archive_venue_id_start_time',
+                  table_name='shows_archive')
+    op.drop_table('shows_archive')
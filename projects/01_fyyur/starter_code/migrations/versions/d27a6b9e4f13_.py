@@ -0,0 +1,44 @@
+"""add show booking indexes and constraints
+
+Revision ID: d27a6b9e4f13
+Revises: a93e5f1b7c42
+Create Date: 2026-10-18 13:25:08.771634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27a6b9e4f13'
+down_revision = 'a93e5f1b7c42'
+branch_labels = None
+depends_on = None
+
+# Must match Show.duration
+SHOW_DURATION = "interval '2 hours'"
+
+
+def upgrade():
+    op.create_index('ix_shows_venue_id_start_time', 'shows',
+                    ['venue_id', 'start_time'])
+    op.create_index('ix_shows_artist_id_start_time', 'shows',
+                    ['artist_id', 'start_time'])
+
+    # Existing double bookings have to be resolved before this can apply
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist;')
+        for column in ('venue_id', 'artist_id'):
+            op.execute(
+                f'ALTER TABLE shows ADD CONSTRAINT shows_{column}_no_overlap '
+                f'EXCLUDE USING gist ({column} WITH =, '
+                f'tsrange(start_time, start_time + {SHOW_DURATION}) WITH &&);')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in ('artist_id', 'venue_id'):
+            op.execute(
+                f'ALTER TABLE shows DROP CONSTRAINT shows_{column}_no_overlap;')
+    op.drop_index('ix_shows_artist_id_start_time', table_name='shows')
+    op.drop_index('ix_shows_venue_id_start_time', table_name='shows')
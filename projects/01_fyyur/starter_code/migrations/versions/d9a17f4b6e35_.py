@@ -0,0 +1,25 @@
+"""add artists state/city index
+
+Revision ID: d9a17f4b6e35
+Revises: c3e85a0f9d14
+Create Date: 2026-10-18 20:41:56.102874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a17f4b6e35'
+down_revision = 'c3e85a0f9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_artists_state_city', 'artists', ['state', 'city'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artists_state_city', table_name='artists')
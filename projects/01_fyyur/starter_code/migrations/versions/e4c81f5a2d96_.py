@@ -0,0 +1,28 @@
+"""add record versions to venues and artists
+
+Revision ID: e4c81f5a2d96
+Revises: d27a6b9e4f13
+Create Date: 2026-10-18 14:02:47.219853
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c81f5a2d96'
+down_revision = 'd27a6b9e4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('venues', sa.Column('version', sa.Integer(),
+                                      nullable=False, server_default='1'))
+    op.add_column('artists', sa.Column('version', sa.Integer(),
+                                       nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('artists', 'version')
+    op.drop_column('venues', 'version')
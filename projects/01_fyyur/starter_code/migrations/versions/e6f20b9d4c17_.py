@@ -0,0 +1,73 @@
+"""add genre bit vectors to venues and artists
+
+Revision ID: e6f20b9d4c17
+Revises: d9a17f4b6e35
+Create Date: 2026-10-18 21:12:40.538117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f20b9d4c17'
+down_revision = 'd9a17f4b6e35'
+branch_labels = None
+depends_on = None
+
+# Bit order of genres.Genre at the time of this migration
+GENRES = ('Alternative', 'Blues', 'Classical', 'Country', 'Electronic',
+          'Folk', 'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+          'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll',
+          'Soul', 'Other')
+
+TABLES = ('venues', 'artists')
+
+
+def upgrade():
+    genres = ', '.join("'" + g + "'" for g in GENRES)
+    op.execute(f'''
+        CREATE FUNCTION genre_mask(genres varchar[]) RETURNS integer
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(bit_or(
+                1 << (array_position(ARRAY[{genres}]::varchar[], g) - 1)
+            ), 0)
+            FROM unnest(genres) AS g
+        $$;
+    ''')
+    # Jaccard similarity of two genre bit vectors
+    op.execute('''
+        CREATE FUNCTION genre_similarity(a integer, b integer)
+        RETURNS double precision
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT CASE WHEN a | b = 0 THEN 0 ELSE
+                length(replace((a & b)::bit(32)::text, '0', ''))::float8
+                / length(replace((a | b)::bit(32)::text, '0', ''))
+            END
+        $$;
+    ''')
+    op.execute('''
+        CREATE FUNCTION set_genre_mask() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.genre_mask := genre_mask(NEW.genres);
+            RETURN NEW;
+        END;
+        $$;
+    ''')
+    for table in TABLES:
+        op.add_column(table, sa.Column('genre_mask', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.execute(f'UPDATE {table} SET genre_mask = genre_mask(genres);')
+        op.execute(f'CREATE TRIGGER {table}_genre_mask '
+                   f'BEFORE INSERT OR UPDATE OF genres ON {table} '
+                   'FOR EACH ROW EXECUTE PROCEDURE set_genre_mask();')
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER {table}_genre_mask ON {table};')
+        op.drop_column(table, 'genre_mask')
+    op.execute('DROP FUNCTION set_genre_mask();')
+    op.execute('DROP FUNCTION genre_similarity(integer, integer);')
+    op.execute('DROP FUNCTION genre_mask(varchar[]);')
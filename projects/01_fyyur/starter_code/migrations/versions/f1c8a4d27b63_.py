@@ -0,0 +1,31 @@
+"""make venue cities and states non-null
+
+Revision ID: f1c8a4d27b63
+Revises: e6f20b9d4c17
+Create Date: 2026-10-18 22:05:17.409352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8a4d27b63'
+down_revision = 'e6f20b9d4c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination of /venues compares (state, city) pairs, which
+    # never match when one side is NULL
+    for column in ('state', 'city'):
+        op.execute(f"UPDATE venues SET {column} = '' WHERE {column} IS NULL")
+        op.alter_column('venues', column, existing_type=sa.String(120),
+                        nullable=False, server_default='')
+
+
+def downgrade():
+    for column in ('state', 'city'):
+        op.alter_column('venues', column, existing_type=sa.String(120),
+                        nullable=True, server_default=None)
@@ -0,0 +1,32 @@
+"""cascade show deletes
+
+Revision ID: f5b92c7d3e08
+Revises: e4c81f5a2d96
+Create Date: 2026-10-18 14:40:12.905417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b92c7d3e08'
+down_revision = 'e4c81f5a2d96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for column, table in (('venue_id', 'venues'), ('artist_id', 'artists')):
+        op.drop_constraint(f'shows_{column}_fkey', 'shows',
+                           type_='foreignkey')
+        op.create_foreign_key(f'shows_{column}_fkey', 'shows', table,
+                              [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for column, table in (('venue_id', 'venues'), ('artist_id', 'artists')):
+        op.drop_constraint(f'shows_{column}_fkey', 'shows',
+                           type_='foreignkey')
+        op.create_foreign_key(f'shows_{column}_fkey', 'shows', table,
+                              [column], ['id'])
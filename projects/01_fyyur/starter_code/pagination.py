@@ -0,0 +1,94 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from exceptions import InvalidCursor
+
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor'])
+
+
+def encode_cursor(values, backward=False):
+    """Encode the sort key of a row into an opaque, URL safe cursor"""
+    payload = {
+        'key': [
+            {'datetime': v.isoformat()} if isinstance(v, datetime) else v
+            for v in values
+        ],
+        'backward': backward
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode()
+    ).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns=None):
+    """Decode a cursor made by `encode_cursor`, checking when `columns` are
+    given that it holds one value of the right type per sort column
+
+    - Returns: (sort key values, whether the cursor points backward)
+    - Raises: InvalidCursor if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [
+            datetime.fromisoformat(v['datetime']) if isinstance(v, dict) else v
+            for v in payload['key']
+        ]
+        backward = payload['backward']
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+    if not isinstance(backward, bool) or columns is not None and (
+        len(values) != len(columns) or any(
+            type(v) is not c.type.python_type for v, c in zip(values, columns)
+        )
+    ):
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    return values, backward
+
+
+def paginate(query, columns, cursor=None, per_page=None, chunk_size=1000):
+    """Return one page of `query` using keyset pagination
+
+    Rows are ordered by `columns`, which must form a unique, non-null key
+    and be selected by the query under their own names. Instead of an
+    OFFSET, the cursor holds the key of the last (or first) row seen, so
+    every page is an index range scan that costs the same however deep it
+    is.
+
+    Without `per_page`, the single page holds the query itself, whose rows
+    are fetched lazily `chunk_size` at a time as it is iterated.
+
+    - Raises: InvalidCursor if `cursor` does not fit `columns`
+    """
+    if not per_page:
+        return Page(query.order_by(*columns).yield_per(chunk_size), None, None)
+
+    values, backward = decode_cursor(cursor, columns) if cursor \
+        else (None, False)
+    key = tuple_(*columns)
+    if values is not None:
+        query = query.filter(
+            key < tuple_(*values) if backward else key > tuple_(*values))
+    order = [c.desc() for c in columns] if backward else columns
+
+    rows = query.order_by(*order).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    def row_key(row):
+        return [getattr(row, c.key) for c in columns]
+
+    has_next = has_more if not backward else values is not None
+    has_prev = values is not None if not backward else has_more
+    return Page(
+        rows,
+        encode_cursor(row_key(rows[-1])) if rows and has_next else None,
+        encode_cursor(row_key(rows[0]), True) if rows and has_prev else None
+    )
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that also records how long checkouts wait for a free
+    connection and how many give up after `pool_timeout`"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+
+def engine_options(uri, pool_size=None, max_overflow=None, pool_timeout=None,
+                   pool_recycle=None, pool_pre_ping=False,
+                   statement_timeout=None):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the given pool settings, leaving
+    unset ones to the SQLAlchemy defaults"""
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+    }
+    options = {k: v for k, v in options.items() if v is not None}
+    options['pool_pre_ping'] = pool_pre_ping
+    if not (uri or '').startswith('sqlite'):
+        options['poolclass'] = InstrumentedQueuePool
+    if statement_timeout and (uri or '').startswith('postgres'):
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={statement_timeout}'
+        }
+    return options
+
+
+def pool_stats(pool):
+    """Return the live state of `pool` as a dict"""
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats.update({
+                'checkouts': checkouts,
+                'timeouts': pool.timeouts,
+                'wait_time_total': pool.wait_time,
+                'wait_time_avg':
+                    pool.wait_time / checkouts if checkouts else None,
+                'wait_time_max': pool.max_wait_time,
+            })
+    return stats
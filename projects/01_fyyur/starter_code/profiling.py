@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block, on any engine
+
+    Yields the list the statements are appended to.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+
+def assert_query_budget(app, path, method='GET', budget=None, **kwargs):
+    """Request `path` with a test client and fail if it runs more queries
+    than `budget`, which defaults to the QUERY_BUDGET setting
+
+    Streamed bodies are read in full, so their queries count as well. Extra
+    keyword arguments are passed to the test client. Returns the response.
+    """
+    if budget is None:
+        budget = app.config['QUERY_BUDGET']
+    with count_queries() as statements:
+        response = app.test_client().open(path, method=method, **kwargs)
+        response.get_data()
+    assert len(statements) <= budget, (
+        f'{method} {path} ran {len(statements)} queries, over its budget '
+        f'of {budget}:\n' + '\n'.join(statements)
+    )
+    return response
+
+
+def assert_query_budgets(app, budgets):
+    """Check the budget of several routes at once
+
+    - budgets: {path: budget}, where a budget of None means QUERY_BUDGET
+    """
+    for path, budget in budgets.items():
+        assert_query_budget(app, path, budget=budget)
@@ -0,0 +1,49 @@
+import itertools
+from datetime import timezone
+
+from formatting import parse_datetime
+
+
+def to_naive_utc(value):
+    """Return a datetime as naive UTC, the way show times are stored"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def expand_schedule(start_times=None, rule=None, dtstart=None,
+                    max_count=500, min_gap=None):
+    """Return the sorted, distinct start times of a batch of shows
+
+    Either `start_times` lists them, or `rule` is an RFC 5545 recurrence
+    rule (e.g. 'FREQ=WEEKLY;COUNT=40') repeating from `dtstart`.
+
+    - Raises: ValueError if the schedule is malformed, empty, longer than
+      `max_count` or has shows closer than `min_gap` to each other
+    """
+    if (start_times is None) == (rule is None):
+        raise ValueError('Give either start_times or rule')
+
+    if rule is not None:
+        if dtstart is None:
+            raise ValueError('dtstart is required with rule')
+        # Imported on first use, like in formatting, as dateutil is slow to
+        # load and most requests never expand a rule
+        from dateutil.rrule import rrulestr
+        occurrences = rrulestr(rule, dtstart=parse_datetime(dtstart))
+        times = list(itertools.islice(occurrences, max_count + 1))
+    else:
+        if not isinstance(start_times, list):
+            raise ValueError('start_times must be a list')
+        times = [parse_datetime(t) for t in start_times]
+
+    times = sorted(set(to_naive_utc(t) for t in times))
+    if not times:
+        raise ValueError('The schedule has no start times')
+    if len(times) > max_count:
+        raise ValueError(f'A schedule may not exceed {max_count} shows')
+    if min_gap is not None:
+        for previous, current in zip(times, times[1:]):
+            if current - previous < min_gap:
+                raise ValueError(f'Shows at {previous} and {current} overlap')
+    return times
@@ -2,3 +2,27 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('input[data-autocomplete]').forEach(function (input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var timer;
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        var url = '/autocomplete?type=' + input.dataset.autocomplete +
+          '&q=' + encodeURIComponent(input.value);
+        fetch(url)
+          .then(function (response) { return response.json(); })
+          .then(function (result) {
+            list.innerHTML = '';
+            result.data.forEach(function (item) {
+              var option = document.createElement('option');
+              option.value = item.name;
+              list.appendChild(option);
+            });
+          });
+      }, 100);
+    });
+  });
+});
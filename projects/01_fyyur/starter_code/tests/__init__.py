@@ -0,0 +1,7 @@
+import os
+
+# The settings are read from the environment when the app is imported, so
+# the tests point it at their own database first
+TEST_DATABASE_URL = os.getenv(
+    'TEST_DATABASE_URL', 'postgresql://localhost:5432/fyyur_test')
+os.environ['SQLALCHEMY_DATABASE_URI'] = TEST_DATABASE_URL
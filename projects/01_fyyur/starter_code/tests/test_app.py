@@ -0,0 +1,130 @@
+import logging
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from app import SECRET_KEY_SIZE, instance_secret_key
+from logs import DroppingQueueHandler, queue_logging, stop_queue_logging
+
+
+class ImportTestCase(unittest.TestCase):
+    def test_slow_imports_are_deferred(self):
+        """Test creating the server application loads neither dateutil nor
+        Babel, which are imported on first use"""
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys\n'
+             'from app import create_app\n'
+             'create_app(migrations=False)\n'
+             'print(sorted({m.split(".")[0] for m in sys.modules}))'],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            env=dict(os.environ, SECRET_KEY='test'),
+            check=True,
+            capture_output=True,
+            text=True
+        )
+
+        modules = result.stdout
+        self.assertNotIn("'dateutil'", modules)
+        self.assertNotIn("'babel'", modules)
+
+
+class SecretKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.app = Flask('fyyur', instance_path=self.directory.name)
+        self.path = os.path.join(self.directory.name, 'secret_key')
+
+    def test_key_is_created_once(self):
+        """Test the key is generated on first use, then read back"""
+        key = instance_secret_key(self.app)
+
+        self.assertEqual(len(key), SECRET_KEY_SIZE)
+        self.assertEqual(instance_secret_key(self.app), key)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(os.listdir(self.directory.name), ['secret_key'])
+
+    def test_first_worker_wins(self):
+        """Test a worker losing the race to create the key uses the winner's
+        """
+        winner = os.urandom(SECRET_KEY_SIZE)
+        link = os.link
+
+        def link_after_another_worker(source, destination):
+            with open(destination, 'wb') as f:
+                f.write(winner)
+            link(source, destination)
+
+        with mock.patch('os.link', side_effect=link_after_another_worker):
+            key = instance_secret_key(self.app)
+
+        self.assertEqual(key, winner)
+        self.assertEqual(os.listdir(self.directory.name), ['secret_key'])
+
+    def test_truncated_key(self):
+        """Test a key file of the wrong size is an error, not a weak key"""
+        with open(self.path, 'wb') as f:
+            f.write(b'short')
+
+        with self.assertRaises(RuntimeError):
+            instance_secret_key(self.app)
+
+
+class QueueLoggingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'app.log')
+        self.logger = logging.getLogger('fyyur.test')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.addCleanup(stop_queue_logging, self.logger)
+
+    def make_handler(self):
+        handler = logging.FileHandler(self.path)
+        handler.setFormatter(logging.Formatter('%(process)d %(message)s'))
+        return handler
+
+    def read_lines(self):
+        with open(self.path) as f:
+            return f.read().splitlines()
+
+    def test_records_are_written_once(self):
+        """Test configuring a logger twice replaces its queue"""
+        queue_logging(self.logger, self.make_handler)
+        queue_logging(self.logger, self.make_handler)
+
+        self.logger.info('listed')
+        stop_queue_logging(self.logger)
+
+        self.assertEqual(self.read_lines(), [f'{os.getpid()} listed'])
+        self.assertFalse([h for h in self.logger.handlers
+                          if isinstance(h, DroppingQueueHandler)])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_forked_worker_logs_with_a_thread_of_its_own(self):
+        """Test a forked worker still writes its records"""
+        queue_logging(self.logger, self.make_handler)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.logger.info('from the worker')
+                stop_queue_logging(self.logger)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.logger.info('from the master')
+        stop_queue_logging(self.logger)
+
+        self.assertCountEqual(self.read_lines(), [
+            f'{pid} from the worker',
+            f'{os.getpid()} from the master',
+        ])
@@ -0,0 +1,96 @@
+import json
+
+from app import db, ArchivedShow, ArtistStats, Show, VenueStats
+from tests.test_fyyur import FyyurTestCase, migrate
+
+
+class ArchiveTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.other_venue_id = self.create_venue(name='The Dueling Pianos Bar')
+        self.artist_id = self.create_artist()
+        self.create_show(
+            self.venue_id, self.artist_id, self.days_from_now(-400))
+        self.other_venue_show = self.days_from_now(-300)
+        self.create_show(
+            self.other_venue_id, self.artist_id, self.other_venue_show)
+        self.create_show(
+            self.venue_id, self.artist_id, self.days_from_now(-10))
+
+    def stats(self, model, id):
+        db.session.expire_all()
+        row = model.query.get(id)
+        return (row.past_shows_count, row.upcoming_shows_count,
+                row.last_show_time)
+
+    def archive(self, *args):
+        result = self.app.test_cli_runner().invoke(
+            args=['archive-shows', *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result
+
+    def test_archive_shows(self):
+        """Test long past shows move to the archive and keep their counts
+            : flask archive-shows
+        """
+        before = self.stats(ArtistStats, self.artist_id)
+
+        result = self.archive('--days', '100')
+
+        self.assertEqual(result.output, '2 shows archived\n')
+        self.assertEqual(Show.query.count(), 1)
+        self.assertEqual(ArchivedShow.query.count(), 2)
+        self.assertEqual(self.stats(ArtistStats, self.artist_id), before)
+        res = self.client().get(f'/api/artists/{self.artist_id}/history')
+        self.assertEqual(len(json.loads(res.data)['data']), 2)
+
+    def test_upcoming_shows_are_not_archived(self):
+        """Test shows after the statistics cutoff stay in the shows table
+            : flask archive-shows
+        """
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+        before = self.stats(VenueStats, self.venue_id)
+
+        result = self.archive('--days', '-30')
+
+        self.assertEqual(result.output, '3 shows archived\n')
+        self.assertEqual(Show.query.count(), 1)
+        self.assertEqual(self.stats(VenueStats, self.venue_id), before)
+
+    def test_delete_takes_archived_shows_out_of_stats(self):
+        """Test deleting a venue uncounts its archived shows for its artists
+            : DELETE /venues/<int:venue_id>
+        """
+        self.archive('--days', '100')
+        self.client().get(f'/api/artists/{self.artist_id}')
+
+        res = self.client().delete(f'/venues/{self.venue_id}')
+        artist = json.loads(
+            self.client().get(f'/api/artists/{self.artist_id}').data)
+
+        self.assertEqual(json.loads(res.data)['ids'], [self.venue_id])
+        self.assertEqual(ArchivedShow.query.count(), 1)
+        self.assertEqual(self.stats(ArtistStats, self.artist_id),
+                         (1, 0, self.other_venue_show))
+        self.assertEqual(artist['past_shows_count'], 1)
+
+    def test_downgrade_keeps_archived_shows_counted_once(self):
+        """Test archived shows restored by the downgrade are not counted
+        twice
+            : flask db downgrade
+        """
+        self.archive('--days', '100')
+        before = self.stats(ArtistStats, self.artist_id)
+        db.session.remove()
+
+        try:
+            migrate('downgrade', 'b7d41e8c2a59')
+            counts = db.session.execute(
+                'SELECT past_shows_count FROM artist_stats').scalar()
+            db.session.remove()
+        finally:
+            migrate('upgrade')
+
+        self.assertEqual(counts, before[0])
+        self.assertEqual(Show.query.count(), 3)
@@ -0,0 +1,103 @@
+import json
+import unittest
+
+from app import name_index
+from autocomplete import PrefixIndex
+from tests.test_fyyur import FyyurTestCase
+
+
+class PrefixIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.build([
+            ('venues', 1, 'The Musical Hop'),
+            ('venues', 2, 'Park Square Live Music & Coffee'),
+            ('artists', 1, 'Guns N Petals'),
+        ])
+
+    def test_prefix_matches_any_word(self):
+        """Test a prefix matches the start of any word, ignoring case"""
+        # Ordered by the names from the matching word on
+        self.assertEqual(
+            [id for _, id, _ in self.index.search('MUSIC')], [2, 1])
+        self.assertEqual(
+            self.index.search('hop'), [('venues', 1, 'The Musical Hop')])
+        self.assertEqual(self.index.search('usic'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+    def test_kind_and_limit(self):
+        """Test results are narrowed down to a kind and a number"""
+        self.assertEqual(self.index.search('music', kind='artists'), [])
+        self.assertEqual(len(self.index.search('music', limit=1)), 1)
+
+    def test_add_and_remove(self):
+        """Test renamed and removed records are found under their new name
+        only"""
+        self.index.add('venues', 1, 'The Dueling Pianos Bar')
+        self.index.remove('artists', 1)
+
+        self.assertEqual(
+            [id for _, id, _ in self.index.search('music')], [2])
+        self.assertEqual(self.index.search('pianos'),
+                         [('venues', 1, 'The Dueling Pianos Bar')])
+        self.assertEqual(self.index.search('guns'), [])
+
+
+class AutocompleteTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue(name='The Musical Hop')
+        self.artist_id = self.create_artist(name='The Wild Sax Band')
+        # Load the index from the database on the next request
+        name_index.built_at = None
+
+    def suggest(self, **params):
+        res = self.client().get('/autocomplete', query_string=params)
+        return res, json.loads(res.data)
+
+    def test_autocomplete(self):
+        """Test venue and artist names are suggested by prefix
+            : GET /autocomplete
+        """
+        res, payload = self.suggest(q='the')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['data'], [
+            {'type': 'venues', 'id': self.venue_id,
+             'name': 'The Musical Hop'},
+            {'type': 'artists', 'id': self.artist_id,
+             'name': 'The Wild Sax Band'},
+        ])
+
+    def test_autocomplete_by_type(self):
+        """Test suggestions are narrowed down to venues or artists
+            : GET /autocomplete
+        """
+        _, payload = self.suggest(q='the', type='venues', limit=5)
+
+        self.assertEqual([s['type'] for s in payload['data']], ['venues'])
+
+    def test_created_records_are_suggested(self):
+        """Test a new artist is suggested without rebuilding the index
+            : POST /artists/create
+        """
+        self.suggest(q='the')
+        self.client().post('/artists/create', data={
+            'name': 'Matt Quevedo',
+            'city': 'New York',
+            'state': 'NY',
+            'genres': ['Jazz'],
+        })
+
+        _, payload = self.suggest(q='matt')
+
+        self.assertEqual(
+            [s['name'] for s in payload['data']], ['Matt Quevedo'])
+
+    def test_autocomplete_bad_type(self):
+        """Test suggestions of an unknown type are refused
+            : GET /autocomplete
+        """
+        res = self.client().get('/autocomplete?q=the&type=shows')
+
+        self.assertEqual(res.status_code, 400)
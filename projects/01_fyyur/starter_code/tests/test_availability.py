@@ -0,0 +1,119 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from app import db, Show
+from tests.test_fyyur import FyyurTestCase
+
+
+class AvailabilityTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+        self.other_artist_id = self.create_artist(name='The Wild Sax Band')
+        self.booked = self.days_from_now(3)
+        self.create_show(self.venue_id, self.artist_id, self.booked)
+
+    def availability(self, **params):
+        res = self.client().get('/shows/availability', query_string=params)
+        return res, json.loads(res.data)
+
+    def test_availability(self):
+        """Test the booked parties are reported, and only those
+            : GET /shows/availability
+        """
+        res, payload = self.availability(
+            venue_id=self.venue_id,
+            artist_id=self.other_artist_id,
+            start=(self.booked + timedelta(hours=1)).isoformat()
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(payload['venue_available'])
+        self.assertTrue(payload['artist_available'])
+        self.assertEqual(len(payload['conflicts']), 1)
+
+    def test_free_slot(self):
+        """Test a slot after the end of the booked show is free
+            : GET /shows/availability
+        """
+        start = self.booked + Show.duration
+        res, payload = self.availability(
+            venue_id=self.venue_id,
+            start=start.isoformat(),
+            end=(start + timedelta(hours=3)).isoformat()
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(payload['venue_available'])
+        self.assertIsNone(payload['artist_available'])
+        self.assertEqual(payload['conflicts'], [])
+
+    def test_availability_bad_request(self):
+        """Test a missing party, a bad datetime or an empty range
+            : GET /shows/availability
+        """
+        start = self.booked.isoformat()
+        for params in (
+            {'start': start},
+            {'venue_id': 'abc', 'start': start},
+            {'venue_id': self.venue_id, 'start': 'tomorrow-ish'},
+            {'venue_id': self.venue_id, 'start': start, 'end': start},
+            {'venue_id': self.venue_id, 'start': start,
+             'end': (self.booked - timedelta(hours=1)).isoformat()},
+        ):
+            with self.subTest(params=params):
+                res, payload = self.availability(**params)
+                self.assertEqual(res.status_code, 400)
+                self.assertEqual(payload['status'], 'failed')
+
+
+class CreateShowTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+
+    def submit(self, start_time):
+        return self.client().post('/shows/create', data={
+            'venue_id': self.venue_id,
+            'artist_id': self.artist_id,
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    def test_create_show(self):
+        """Test a show is listed
+            : POST /shows/create
+        """
+        res = self.submit(self.days_from_now(1))
+
+        self.assertIn(b'Show was successfully listed!', res.data)
+        self.assertEqual(Show.query.count(), 1)
+
+    def test_booking_conflict(self):
+        """Test a show overlapping another one is refused
+            : POST /shows/create
+        """
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+
+        res = self.submit(self.days_from_now(1) + timedelta(hours=1))
+
+        self.assertIn(b'already booked', res.data)
+        self.assertEqual(Show.query.count(), 1)
+
+    def test_failed_commit_is_rolled_back(self):
+        """Test a show the database refuses leaves the session usable
+            : POST /shows/create
+        """
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+
+        # Another request booked the slot after the conflict check passed
+        with mock.patch.object(Show, 'conflicts', return_value=[]), \
+                mock.patch.object(db.session, 'rollback',
+                                  wraps=db.session.rollback) as rollback:
+            res = self.submit(self.days_from_now(1))
+
+        self.assertIn(b'Show could not be listed', res.data)
+        rollback.assert_called_once_with()
+        self.assertEqual(Show.query.count(), 1)
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import cache, db
+from cache import Cache, LRUBackend
+from profiling import count_queries
+from tests.test_fyyur import FyyurTestCase
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = Cache()
+        self.cache.backend = LRUBackend(maxsize=2)
+        self.loads = []
+
+    def load(self, value):
+        def loader():
+            self.loads.append(value)
+            return value
+        return loader
+
+    def test_read_through(self):
+        """Test values are loaded once, then served from the cache"""
+        self.assertEqual(self.cache.get_or_set('a', self.load(1)), 1)
+        self.assertEqual(self.cache.get_or_set('a', self.load(2)), 1)
+
+        self.assertEqual(self.loads, [1])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the backend keeps at most maxsize entries"""
+        self.cache.get_or_set('a', self.load('a'))
+        self.cache.get_or_set('b', self.load('b'))
+        self.cache.get_or_set('a', self.load('a'))
+        self.cache.get_or_set('c', self.load('c'))
+        self.cache.get_or_set('b', self.load('b'))
+
+        self.assertEqual(self.loads, ['a', 'b', 'c', 'b'])
+
+    def test_new_generation_invalidates_entries(self):
+        """Test entries stored under another generation are reloaded"""
+        self.cache.get_or_set('a', self.load(1), generation=1)
+        value = self.cache.get_or_set('a', self.load(2), generation=2)
+
+        self.assertEqual(value, 2)
+        self.assertEqual(self.cache.misses, 2)
+
+
+class DetailCacheTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+
+    def fetch_venue(self):
+        return json.loads(
+            self.client().get(f'/api/venues/{self.venue_id}').data)
+
+    def test_detail_is_served_from_cache(self):
+        """Test a cached detail payload is not loaded again
+            : GET /api/venues/<int:venue_id>
+        """
+        with count_queries() as first:
+            self.fetch_venue()
+        with count_queries() as second:
+            payload = self.fetch_venue()
+
+        self.assertEqual(payload['name'], 'The Musical Hop')
+        self.assertLess(len(second), len(first))
+
+    def test_edit_invalidates_detail(self):
+        """Test editing a venue drops its cached payload
+            : POST /venues/<int:venue_id>/edit
+        """
+        self.fetch_venue()
+
+        res = self.client().post(f'/venues/{self.venue_id}/edit', data={
+            'name': 'The Musical Hop II',
+            'city': 'San Francisco',
+            'state': 'CA',
+            'address': '1015 Folsom Street',
+            'genres': ['Jazz'],
+            'version': 1,
+        })
+
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(self.fetch_venue()['name'], 'The Musical Hop II')
+
+    def test_import_invalidates_details_of_every_process(self):
+        """Test the import command invalidates payloads cached by servers
+            : flask import shows
+        """
+        self.fetch_venue()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'shows.csv')
+            with open(path, 'w') as f:
+                f.write('venue_id,artist_id,start_time\n'
+                        f'{self.venue_id},{self.artist_id},'
+                        f'{self.days_from_now(5)}\n')
+            # The command runs in a process of its own, whose cache is not
+            # the one of the server
+            with mock.patch.object(cache, 'clear'):
+                result = self.app.test_cli_runner().invoke(
+                    args=['import', 'shows', path])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.fetch_venue()['upcoming_shows_count'], 1)
+
+    def test_write_of_another_worker_invalidates_detail(self):
+        """Test a payload cached before another worker's write is reloaded
+            : GET /api/venues/<int:venue_id>
+        """
+        self.fetch_venue()
+        # A connection of its own stands in for the other worker, whose
+        # write cannot reach this worker's cache
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.text('UPDATE venues SET name = :name WHERE id = :id'),
+                name='The Musical Hop II', id=self.venue_id)
+
+        self.assertEqual(self.fetch_venue()['name'], 'The Musical Hop II')
@@ -0,0 +1,95 @@
+import json
+
+from app import db
+from tests.test_fyyur import FyyurTestCase
+
+
+class ConditionalGetTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artist_id = self.create_artist()
+
+    def test_unchanged_listing_is_not_modified(self):
+        """Test a listing answers 304 to its own ETag
+            : GET /artists
+        """
+        first = self.client().get('/artists')
+        first.get_data()
+
+        res = self.client().get(
+            '/artists', headers={'If-None-Match': first.headers['ETag']})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.get_data(), b'')
+
+    def test_changed_listing_gets_a_new_etag(self):
+        """Test a write to a table the page depends on changes its ETag
+            : GET /artists
+        """
+        first = self.client().get('/artists')
+        first.get_data()
+        self.create_artist(name='Matt Quevedo')
+
+        res = self.client().get(
+            '/artists', headers={'If-None-Match': first.headers['ETag']})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers['ETag'], first.headers['ETag'])
+        self.assertIn('Matt Quevedo', res.get_data(as_text=True))
+
+    def test_if_modified_since(self):
+        """Test Last-Modified is honored when there is no ETag
+            : GET /artists/<int:artist_id>
+        """
+        first = self.client().get(f'/artists/{self.artist_id}')
+
+        res = self.client().get(
+            f'/artists/{self.artist_id}',
+            headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_stale_etag(self):
+        """Test an unknown ETag gets the full page
+            : GET /artists
+        """
+        res = self.client().get(
+            '/artists', headers={'If-None-Match': '"stale"'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('Guns N Petals', res.get_data(as_text=True))
+
+    def test_html_and_json_have_different_etags(self):
+        """Test the ETag depends on the representation
+            : GET /artists/<int:artist_id>
+        """
+        html = self.client().get(f'/artists/{self.artist_id}')
+        data = self.client().get(
+            f'/artists/{self.artist_id}',
+            headers={'Accept': 'application/json'})
+
+        self.assertEqual(data.content_type, 'application/json')
+        self.assertNotEqual(html.headers['ETag'], data.headers['ETag'])
+        self.assertIn('Accept', data.headers['Vary'])
+
+    def test_etag_is_not_pinned_to_a_stale_payload(self):
+        """Test a payload cached before another worker's write is not served
+        under the ETag of that write
+            : GET /api/artists/<int:artist_id>
+        """
+        path = f'/api/artists/{self.artist_id}'
+        self.client().get(path).get_data()
+        # A connection of its own stands in for the other worker
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.text('UPDATE artists SET name = :name WHERE id = :id'),
+                name='Matt Quevedo', id=self.artist_id)
+
+        res = self.client().get(path)
+        revalidated = self.client().get(
+            path, headers={'If-None-Match': res.headers['ETag']})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.data)['name'], 'Matt Quevedo')
+        self.assertEqual(revalidated.status_code, 304)
@@ -0,0 +1,62 @@
+import json
+
+from app import Artist, Show, Venue
+from tests.test_fyyur import FyyurTestCase
+
+
+class DeleteTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.other_venue_id = self.create_venue(name='The Dueling Pianos Bar')
+        self.artist_id = self.create_artist()
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+        self.create_show(
+            self.other_venue_id, self.artist_id, self.days_from_now(2))
+
+    def test_delete_venue(self):
+        """Test a venue is deleted with its shows, not with its artists
+            : DELETE /venues/<int:venue_id>
+        """
+        res = self.client().delete(f'/venues/{self.venue_id}')
+        payload = json.loads(res.data)
+
+        self.assertEqual(payload['ids'], [self.venue_id])
+        self.assertIsNone(Venue.query.get(self.venue_id))
+        self.assertEqual(Show.query.count(), 1)
+        self.assertIsNotNone(Artist.query.get(self.artist_id))
+
+    def test_delete_updates_counterpart_detail(self):
+        """Test the artist of a deleted show no longer lists it
+            : POST /venues/delete
+        """
+        self.client().get(f'/api/artists/{self.artist_id}')
+
+        res = self.client().post(
+            '/venues/delete', json={'ids': [self.venue_id, 999]})
+        artist = json.loads(
+            self.client().get(f'/api/artists/{self.artist_id}').data)
+
+        self.assertEqual(json.loads(res.data)['ids'], [self.venue_id])
+        self.assertEqual(artist['upcoming_shows_count'], 1)
+
+    def test_delete_bad_ids(self):
+        """Test ids that are not a list of integers are refused untouched
+            : POST /artists/delete
+        """
+        for ids in ('42', {'7': 1}, [True], [1.0], ['1'], None):
+            with self.subTest(ids=ids):
+                res = self.client().post('/artists/delete', json={'ids': ids})
+                payload = json.loads(res.data)
+                self.assertEqual(res.status_code, 400)
+                self.assertEqual(payload['status'], 'failed')
+        self.assertEqual(Artist.query.count(), 1)
+
+    def test_delete_by_path_needs_an_integer(self):
+        """Test a single delete with an id that is not an integer
+            : DELETE /artists/<int:artist_id>
+        """
+        res = self.client().delete('/artists/abc')
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(Artist.query.count(), 1)
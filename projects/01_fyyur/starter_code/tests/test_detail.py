@@ -0,0 +1,68 @@
+import json
+
+from tests.test_fyyur import FyyurTestCase
+
+
+class DetailTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+        self.start_times = [
+            self.days_from_now(days) for days in (-30, -20, -10, 10, 20)]
+        for start_time in self.start_times:
+            self.create_show(self.venue_id, self.artist_id, start_time)
+
+    def test_venue_detail_splits_past_and_upcoming_shows(self):
+        """Test the past and upcoming shows of a venue
+            : GET /api/venues/<int:venue_id>
+        """
+        res = self.client().get(f'/api/venues/{self.venue_id}')
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['past_shows_count'], 3)
+        self.assertEqual(payload['upcoming_shows_count'], 2)
+        self.assertEqual(len(payload['past_shows']), 3)
+        self.assertEqual(
+            payload['upcoming_shows'][0]['artist_name'], 'Guns N Petals')
+        times = [s['start_time'] for s in payload['past_shows']]
+        self.assertEqual(times, sorted(times))
+
+    def test_past_shows_limit_keeps_exact_counts(self):
+        """Test PAST_SHOWS_LIMIT lists the latest past shows only
+            : GET /api/artists/<int:artist_id>
+        """
+        self.app.config['PAST_SHOWS_LIMIT'] = 1
+        try:
+            res = self.client().get(f'/api/artists/{self.artist_id}')
+        finally:
+            self.app.config['PAST_SHOWS_LIMIT'] = None
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['past_shows_count'], 3)
+        self.assertEqual(len(payload['past_shows']), 1)
+        self.assertEqual(payload['past_shows'][0]['start_time'],
+                         self.start_times[2].isoformat() + '+00:00')
+
+    def test_detail_of_missing_venue(self):
+        """Test the detail page of a venue that does not exist
+            : GET /venues/<int:venue_id>
+        """
+        res = self.client().get('/venues/9999')
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_detail_of_missing_artist(self):
+        """Test the JSON detail of an artist that does not exist
+            : GET /api/artists/<int:artist_id>
+        """
+        res = self.client().get('/api/artists/9999')
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(payload['message'], 'Not Found')
@@ -0,0 +1,94 @@
+from app import db, Artist, Venue
+from exceptions import EditConflict
+from profiling import count_queries
+from tests.test_fyyur import FyyurTestCase
+
+
+class EditTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+
+    def venue_form(self, **kwargs):
+        return dict({
+            'name': 'The Musical Hop',
+            'city': 'San Francisco',
+            'state': 'CA',
+            'address': '1015 Folsom Street',
+            'genres': ['Jazz'],
+            'version': 1,
+        }, **kwargs)
+
+    def test_update_changed_columns_only(self):
+        """Test only the changed columns are written, and the version bumps
+        """
+        with count_queries() as statements:
+            changed = Venue.update_changed(
+                self.venue_id,
+                {'name': 'The Musical Hop', 'phone': '123-123-1234'},
+                version=1
+            )
+            db.session.commit()
+
+        update, = [s for s in statements if s.startswith('UPDATE venues')]
+        self.assertEqual(changed, ['phone'])
+        self.assertIn('phone=', update)
+        self.assertNotIn('name=', update)
+        venue = Venue.query.get(self.venue_id)
+        self.assertEqual((venue.phone, venue.version), ('123-123-1234', 2))
+
+    def test_update_without_changes(self):
+        """Test an unchanged record is not written at all"""
+        with count_queries() as statements:
+            changed = Artist.update_changed(
+                self.artist_id, {'name': 'Guns N Petals'})
+
+        self.assertEqual(changed, [])
+        self.assertFalse([s for s in statements if s.startswith('UPDATE')])
+
+    def test_update_stale_version(self):
+        """Test an update based on an outdated version is refused"""
+        with self.assertRaises(EditConflict):
+            Venue.update_changed(
+                self.venue_id, {'name': 'The Dueling Pianos Bar'}, version=0)
+        with self.assertRaises(LookupError):
+            Venue.update_changed(999, {'name': 'The Dueling Pianos Bar'})
+
+    def test_edit_venue(self):
+        """Test a venue edit is saved
+            : POST /venues/<int:venue_id>/edit
+        """
+        res = self.client().post(
+            f'/venues/{self.venue_id}/edit',
+            data=self.venue_form(phone='123-123-1234'),
+            follow_redirects=True
+        )
+
+        self.assertIn(b'was successfully updated', res.data)
+        self.assertEqual(Venue.query.get(self.venue_id).version, 2)
+
+    def test_edit_conflict(self):
+        """Test saving a form loaded before another edit is refused
+            : POST /venues/<int:venue_id>/edit
+        """
+        self.client().post(f'/venues/{self.venue_id}/edit',
+                           data=self.venue_form(phone='123-123-1234'))
+
+        res = self.client().post(
+            f'/venues/{self.venue_id}/edit',
+            data=self.venue_form(name='The Dueling Pianos Bar'),
+            follow_redirects=True
+        )
+
+        self.assertIn(b'was changed by someone else meanwhile', res.data)
+        venue = Venue.query.get(self.venue_id)
+        self.assertEqual((venue.name, venue.version), ('The Musical Hop', 2))
+
+    def test_edit_missing_venue(self):
+        """Test editing a venue that does not exist
+            : POST /venues/<int:venue_id>/edit
+        """
+        res = self.client().post('/venues/999/edit', data=self.venue_form())
+
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,36 @@
+import unittest
+from datetime import datetime, timezone
+
+import babel.dates
+
+from formatting import PATTERNS, format_datetime, get_locale, parse_datetime
+
+
+class FormatDatetimeTestCase(unittest.TestCase):
+    def babel_format(self, date, format):
+        return babel.dates.format_datetime(
+            date.replace(tzinfo=timezone.utc), PATTERNS[format],
+            tzinfo=timezone.utc, locale=get_locale())
+
+    def test_matches_babel(self):
+        """Test the fast path formats like Babel's format_datetime"""
+        date = datetime(2035, 4, 1, 20, 30)
+        for format in ('full', 'medium'):
+            self.assertEqual(format_datetime(date, format),
+                             self.babel_format(date, format))
+
+    def test_iso_strings(self):
+        """Test ISO 8601 strings, such as those of the JSON payloads"""
+        self.assertEqual(
+            format_datetime('2035-04-01T20:30:00+00:00', 'full'),
+            self.babel_format(datetime(2035, 4, 1, 20, 30), 'full'))
+
+    def test_other_strings_fall_back_to_dateutil(self):
+        """Test strings that are not ISO 8601"""
+        self.assertEqual(parse_datetime('April 1 2035 8:30 PM'),
+                         datetime(2035, 4, 1, 20, 30))
+
+    def test_invalid_string(self):
+        """Test a string that is not a date"""
+        with self.assertRaises(ValueError):
+            format_datetime('not a date')
@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+import sqlalchemy
+
+from app import (
+    create_app, db, cache, name_index, warm_name_index, Venue, Artist, Show,
+    ShowStatsCutoff
+)
+from tests import TEST_DATABASE_URL
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TABLES = ('shows', 'shows_archive', 'venue_stats', 'artist_stats', 'venues',
+          'artists')
+_database_ready = None
+
+
+def setup_database():
+    """Rebuild the schema of the test database with the migrations, once per
+    test run
+
+    - Returns: Whether the test database could be reached
+    """
+    global _database_ready
+    if _database_ready is None:
+        engine = sqlalchemy.create_engine(TEST_DATABASE_URL)
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    'DROP SCHEMA public CASCADE; CREATE SCHEMA public;')
+        except sqlalchemy.exc.OperationalError:
+            _database_ready = False
+            return False
+        finally:
+            engine.dispose()
+        migrate('upgrade')
+        _database_ready = True
+    return _database_ready
+
+
+def migrate(*args):
+    """Run `flask db` with `args` against the test database"""
+    subprocess.run(
+        [sys.executable, '-m', 'flask', 'db', *args],
+        cwd=BASEDIR,
+        env=dict(os.environ, FLASK_APP='app.py',
+                 SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL),
+        check=True,
+        capture_output=True
+    )
+
+
+class FyyurTestCase(unittest.TestCase):
+    """This class represents the Fyyur test case, run against the database
+    named by TEST_DATABASE_URL"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not setup_database():
+            raise unittest.SkipTest(f'{TEST_DATABASE_URL} is not reachable')
+        cls.app = create_app(migrations=False)
+        cls.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+        # Tests build the autocomplete index themselves rather than race
+        # with a background build
+        cls.app.before_first_request_funcs.remove(warm_name_index)
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.engine.dispose()
+
+    def setUp(self):
+        """Define test variables and start from empty tables"""
+        self.client = self.app.test_client
+        self.context = self.app.app_context()
+        self.context.push()
+        db.session.execute(
+            f'TRUNCATE {", ".join(TABLES)} RESTART IDENTITY CASCADE')
+        db.session.query(ShowStatsCutoff).update(
+            {ShowStatsCutoff.cutoff: datetime.now()})
+        db.session.commit()
+        cache.clear()
+        name_index.build([])
+
+    def tearDown(self):
+        """Executed after each test"""
+        db.session.remove()
+        self.context.pop()
+
+    def create_venue(self, **kwargs):
+        venue = Venue(**dict({
+            'name': 'The Musical Hop',
+            'city': 'San Francisco',
+            'state': 'CA',
+            'address': '1015 Folsom Street',
+            'genres': ['Jazz'],
+        }, **kwargs))
+        db.session.add(venue)
+        db.session.commit()
+        return venue.id
+
+    def create_artist(self, **kwargs):
+        artist = Artist(**dict({
+            'name': 'Guns N Petals',
+            'city': 'San Francisco',
+            'state': 'CA',
+            'genres': ['Rock n Roll'],
+        }, **kwargs))
+        db.session.add(artist)
+        db.session.commit()
+        return artist.id
+
+    def create_show(self, venue_id, artist_id, start_time):
+        show = Show(venue_id=venue_id, artist_id=artist_id,
+                    start_time=start_time)
+        db.session.add(show)
+        db.session.commit()
+        return show.id
+
+    @staticmethod
+    def days_from_now(days):
+        return datetime.now().replace(microsecond=0) + timedelta(days=days)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+
+from tests.test_fyyur import FyyurTestCase
+
+
+class GenreTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hop_id = self.create_venue(genres=['Jazz', 'Folk'])
+        self.create_venue(name='The Dueling Pianos Bar', genres=['Classical'])
+        self.create_venue(name='Park Square Live Music & Coffee',
+                          genres=['Folk', 'Not A Genre'])
+        self.create_artist(genres=['Rock n Roll'])
+        self.create_artist(name='Matt Quevedo', genres=['Jazz'])
+
+    def test_genre_facets(self):
+        """Test records are counted per genre, in genre order
+            : GET /genres
+        """
+        res = self.client().get('/genres')
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['venues'], [
+            {'genre': 'Classical', 'count': 1},
+            {'genre': 'Folk', 'count': 2},
+            {'genre': 'Jazz', 'count': 1},
+        ])
+        self.assertEqual(payload['artists'], [
+            {'genre': 'Jazz', 'count': 1},
+            {'genre': 'Rock n Roll', 'count': 1},
+        ])
+
+    def test_search_by_genre(self):
+        """Test results are narrowed down to a genre, facets are not
+            : GET /api/venues/search
+        """
+        res = self.client().get('/api/venues/search', query_string={
+            'search_term': '', 'genre': 'Jazz'})
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([v['id'] for v in payload['data']], [self.hop_id])
+        self.assertEqual(
+            {f['genre']: f['count'] for f in payload['facets']},
+            {'Classical': 1, 'Folk': 2, 'Jazz': 1}
+        )
+
+    def test_facets_follow_the_search_term(self):
+        """Test facets only count the records matching the search term
+            : GET /api/venues/search
+        """
+        res = self.client().get(
+            '/api/venues/search', query_string={'search_term': 'Park'})
+        payload = json.loads(res.data)
+
+        self.assertEqual(payload['facets'], [{'genre': 'Folk', 'count': 1}])
+
+    def test_unknown_genre(self):
+        """Test a genre that is not in the list is refused
+            : GET /api/artists/search
+        """
+        res = self.client().get('/api/artists/search', query_string={
+            'search_term': '', 'genre': 'Polka'})
+
+        self.assertEqual(res.status_code, 400)
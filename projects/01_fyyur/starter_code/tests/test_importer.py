@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from app import Show
+from importer import read_rows, to_copy_value
+from tests.test_fyyur import FyyurTestCase
+
+
+class ReadRowsTestCase(unittest.TestCase):
+    def test_reads_csv_and_json_lines(self):
+        """Test both input formats yield one dict per record"""
+        csv_rows = list(read_rows(io.StringIO('name,city\nA,B\n'), 'csv'))
+        jsonl_rows = list(read_rows(
+            io.StringIO('{"name": "A"}\n\n{"name": "C"}\n'), 'jsonl'))
+
+        self.assertEqual(csv_rows, [{'name': 'A', 'city': 'B'}])
+        self.assertEqual(jsonl_rows, [{'name': 'A'}, {'name': 'C'}])
+
+    def test_unknown_format(self):
+        """Test an unknown input format is refused"""
+        with self.assertRaises(ValueError):
+            list(read_rows(io.StringIO(''), 'xml'))
+
+    def test_copy_values(self):
+        """Test values are written the way COPY reads them"""
+        self.assertEqual(to_copy_value(None), '\\N')
+        self.assertEqual(to_copy_value(True), 't')
+        self.assertEqual(to_copy_value(['Jazz', 'R"B']), '{"Jazz","R\\"B"}')
+
+
+class ImportTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def import_shows(self, lines):
+        path = os.path.join(self.directory.name, 'shows.csv')
+        with open(path, 'w') as f:
+            f.write('venue_id,artist_id,start_time\n' + ''.join(lines))
+        result = self.app.test_cli_runner().invoke(
+            args=['import', 'shows', path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(f'{path}.rejected.jsonl') as f:
+            rejects = [json.loads(line) for line in f]
+        return result, rejects
+
+    def test_import_shows(self):
+        """Test every valid record is imported in one batch
+            : flask import shows
+        """
+        result, rejects = self.import_shows([
+            f'{self.venue_id},{self.artist_id},{self.days_from_now(days)}\n'
+            for days in (1, 2, 3)
+        ])
+
+        self.assertIn('Done: 3 shows imported, 0 rejected', result.output)
+        self.assertEqual(rejects, [])
+        self.assertEqual(Show.query.count(), 3)
+
+    def test_database_errors_reject_only_the_offending_records(self):
+        """Test a record the database refuses does not fail its batch
+            : flask import shows
+        """
+        result, rejects = self.import_shows([
+            f'{self.venue_id},{self.artist_id},{self.days_from_now(1)}\n',
+            f'999,{self.artist_id},{self.days_from_now(2)}\n',
+            f'{self.venue_id},{self.artist_id},{self.days_from_now(3)}\n',
+        ])
+
+        self.assertIn('Done: 2 shows imported, 1 rejected', result.output)
+        self.assertEqual(Show.query.count(), 2)
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(rejects[0]['row']['venue_id'], '999')
+        self.assertIn('foreign key', rejects[0]['errors']['_row'][0])
+
+    def test_invalid_records_are_rejected(self):
+        """Test records failing the form validation are never inserted
+            : flask import shows
+        """
+        result, rejects = self.import_shows([
+            f'{self.venue_id},,{self.days_from_now(1)}\n',
+            f'{self.venue_id},{self.artist_id},{self.days_from_now(2)}\n',
+        ])
+
+        self.assertIn('Done: 1 shows imported, 1 rejected', result.output)
+        self.assertEqual(Show.query.count(), 1)
+        self.assertIn('artist_id', rejects[0]['errors'])
@@ -0,0 +1,64 @@
+import json
+
+from tests.test_fyyur import FyyurTestCase
+
+
+class JSONTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_ids = [
+            self.create_venue(name=f'Venue {i}') for i in range(5)]
+        self.artist_id = self.create_artist()
+        chunk_size = self.app.config['STREAM_CHUNK_SIZE']
+        self.addCleanup(
+            self.app.config.update, STREAM_CHUNK_SIZE=chunk_size)
+        self.app.config['STREAM_CHUNK_SIZE'] = 2
+
+    def test_listing_is_streamed(self):
+        """Test a listing is sent as a JSON array, chunk by chunk
+            : GET /api/venues
+        """
+        res = self.client().get('/api/venues')
+        chunks = list(res.response)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_streamed)
+        self.assertEqual(res.mimetype, 'application/json')
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(
+            [v['id'] for v in json.loads(b''.join(chunks))], self.venue_ids)
+
+    def test_empty_listing(self):
+        """Test an empty listing is still a JSON array
+            : GET /api/artists
+        """
+        self.client().delete(f'/artists/{self.artist_id}')
+
+        res = self.client().get('/api/artists')
+
+        self.assertEqual(json.loads(res.data), [])
+
+    def test_accept_header(self):
+        """Test clients preferring JSON get JSON on the HTML routes
+            : GET /artists/<int:artist_id>
+        """
+        res = self.client().get(
+            f'/artists/{self.artist_id}',
+            headers={'Accept': 'application/json'})
+        html = self.client().get(
+            f'/artists/{self.artist_id}', headers={'Accept': 'text/html'})
+
+        self.assertEqual(json.loads(res.data)['name'], 'Guns N Petals')
+        self.assertEqual(html.mimetype, 'text/html')
+
+    def test_json_not_found(self):
+        """Test JSON clients get errors as JSON
+            : GET /api/venues/<int:venue_id>
+        """
+        res = self.client().get('/api/venues/999')
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(payload['message'], 'Not Found')
+        self.assertEqual(
+            self.client().get('/venues/999').mimetype, 'text/html')
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import unittest
+
+from logs import DroppingQueueHandler, JSONFormatter, file_handler
+from tests.test_fyyur import FyyurTestCase
+
+
+class LogsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'error.log')
+
+    def record(self, message, *args, **extra):
+        return logging.makeLogRecord(
+            dict(extra, msg=message, args=args, levelno=logging.INFO,
+                 levelname='INFO', name='app'))
+
+    def test_json_formatter(self):
+        """Test records are formatted as JSON with their extra fields"""
+        data = json.loads(JSONFormatter().format(
+            self.record('GET %s', '/venues', route='/venues', status=200)))
+
+        self.assertEqual(data['message'], 'GET /venues')
+        self.assertEqual(data['route'], '/venues')
+        self.assertEqual(data['status'], 200)
+        self.assertNotIn('args', data)
+
+    def test_queue_handler_drops_when_full(self):
+        """Test a full queue drops records instead of blocking"""
+        handler = DroppingQueueHandler(queue.Queue(1))
+
+        handler.handle(self.record('first'))
+        handler.handle(self.record('second'))
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.get_nowait().msg, 'first')
+
+    def test_file_is_reopened_after_rotation(self):
+        """Test records go to a new file once logrotate moved the old one"""
+        handler = file_handler(self.path)
+        self.addCleanup(handler.close)
+
+        handler.handle(self.record('before'))
+        os.rename(self.path, f'{self.path}.1')
+        handler.handle(self.record('after'))
+
+        with open(f'{self.path}.1') as f:
+            self.assertEqual(f.read(), 'before\n')
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'after\n')
+
+
+class RequestLogTestCase(FyyurTestCase):
+    def test_request_is_logged(self):
+        """Test each request is logged with its route, status and queries
+        once the JSON log is set up
+            : GET /venues/<int:venue_id>
+        """
+        venue_id = self.create_venue()
+        self.app.extensions['request_log'] = True
+        self.addCleanup(self.app.extensions.pop, 'request_log')
+
+        with self.assertLogs(self.app.logger, logging.INFO) as logs:
+            self.client().get(f'/venues/{venue_id}')
+            self.client().get('/venues/999')
+
+        ok, not_found = logs.records
+        self.assertEqual(ok.route, '/venues/<int:venue_id>')
+        self.assertEqual(ok.status, 200)
+        self.assertGreater(ok.queries, 0)
+        self.assertGreaterEqual(ok.latency_ms, 0)
+        self.assertEqual(not_found.status, 404)
+
+    def test_debug_server_logs_requests_alone(self):
+        """Test requests are not logged twice without the JSON log
+            : GET /venues
+        """
+        with self.assertNoLogs(self.app.logger, logging.INFO):
+            self.client().get('/venues')
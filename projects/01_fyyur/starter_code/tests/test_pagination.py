@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime
+
+from app import Artist, Show, Venue
+from exceptions import InvalidCursor
+from pagination import decode_cursor, encode_cursor
+from tests.test_fyyur import FyyurTestCase
+
+
+class CursorTestCase(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the key it was made from"""
+        key = [datetime(2035, 4, 1, 20, 0), 7]
+
+        cursor = encode_cursor(key, backward=True)
+
+        self.assertEqual(decode_cursor(cursor), (key, True))
+        self.assertEqual(
+            decode_cursor(cursor, [Show.start_time, Show.id]), (key, True))
+
+    def test_malformed_cursor(self):
+        """Test cursors that are not made by encode_cursor"""
+        for cursor in ('', 'not-a-cursor', encode_cursor([1])[:-2]):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_cursor_not_fitting_the_sort_key(self):
+        """Test cursors with the wrong number or types of values"""
+        columns = [Show.start_time, Show.id]
+        for key in ([1], [1, 2], [datetime(2035, 4, 1), '7'],
+                    [datetime(2035, 4, 1), True], [None, 7]):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(encode_cursor(key), columns)
+
+
+class KeysetPaginationTestCase(FyyurTestCase):
+    def test_walk_artist_pages(self):
+        """Test following next and previous cursors through every page"""
+        ids = [self.create_artist(name=f'Artist {i}') for i in range(5)]
+
+        seen, cursor, pages = [], None, []
+        while True:
+            page = Artist.listing(cursor=cursor, per_page=2)
+            seen += [artist['id'] for artist in page.items]
+            pages.append(page)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        previous = Artist.listing(cursor=pages[-1].prev_cursor, per_page=2)
+
+        self.assertEqual(seen, ids)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0].prev_cursor)
+        self.assertEqual(
+            [artist['id'] for artist in previous.items], ids[2:4])
+
+    def test_walk_venue_areas_with_empty_city(self):
+        """Test areas without a city are listed once"""
+        self.create_venue(city='')
+        self.create_venue(name='The Dueling Pianos Bar', city='New York',
+                          state='NY')
+        self.create_venue(name='Park Square', city='Oakland')
+
+        first = Venue.areas(per_page=2)
+        second = Venue.areas(cursor=first.next_cursor, per_page=2)
+
+        self.assertEqual(
+            [(a['state'], a['city']) for a in first.items + second.items],
+            [('CA', ''), ('CA', 'Oakland'), ('NY', 'New York')])
+        self.assertIsNone(second.next_cursor)
+
+    def test_listing_with_cursor_of_another_listing(self):
+        """Test a well-formed cursor of the wrong shape is rejected
+            : GET /artists?cursor=..., GET /venues?cursor=...
+        """
+        show_cursor = encode_cursor([datetime(2035, 4, 1), 7])
+        artist_cursor = encode_cursor([7])
+
+        for path in (f'/artists?cursor={show_cursor}',
+                     f'/venues?cursor={artist_cursor}',
+                     f'/shows?cursor={artist_cursor}'):
+            res = self.client().get(path)
+
+            self.assertEqual(res.status_code, 400, path)
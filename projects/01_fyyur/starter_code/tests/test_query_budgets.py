@@ -0,0 +1,76 @@
+import logging
+
+from profiling import assert_query_budget, assert_query_budgets
+from tests.test_fyyur import FyyurTestCase
+
+
+class QueryBudgetTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        # Enough records on every page for a query per row to show
+        venue_ids = [
+            self.create_venue(name=f'Venue {i}', city=f'City {i % 3}')
+            for i in range(8)
+        ]
+        artist_ids = [
+            self.create_artist(name=f'Artist {i}') for i in range(8)]
+        for i, venue_id in enumerate(venue_ids):
+            self.create_show(
+                venue_id, artist_ids[i], self.days_from_now(i + 1))
+            self.create_show(
+                venue_id, artist_ids[i - 1], self.days_from_now(-i - 1))
+        self.venue_id = venue_ids[0]
+        self.artist_id = artist_ids[0]
+
+    def test_route_budgets(self):
+        """Test no route runs more queries than its budget"""
+        venue, artist = self.venue_id, self.artist_id
+        assert_query_budgets(self.app, {
+            '/': 0,
+            '/venues': 3,
+            '/api/venues': 2,
+            '/artists': 2,
+            '/api/artists': 2,
+            '/shows': 2,
+            '/api/shows': 2,
+            f'/venues/{venue}': 5,
+            f'/api/venues/{venue}': 5,
+            f'/artists/{artist}': 5,
+            f'/api/artists/{artist}': 5,
+            f'/venues/{venue}/history': 3,
+            f'/artists/{artist}/history': 3,
+            f'/venues/{venue}/recommendations': 3,
+            f'/venues/{venue}/edit': 1,
+            f'/artists/{artist}/edit': 1,
+            '/venues/search?search_term=Venue': 2,
+            '/artists/search?search_term=Artist': 2,
+            '/search?search_term=e': 1,
+            '/genres': 2,
+            '/autocomplete?q=Ve': 1,
+            f'/shows/availability?venue_id={venue}'
+            f'&start={self.days_from_now(1).isoformat()}': 1,
+        })
+
+    def test_over_budget(self):
+        """Test a route over its budget fails with the queries it ran"""
+        with self.assertRaises(AssertionError) as raised:
+            assert_query_budget(self.app, '/venues', budget=1)
+
+        self.assertIn('GET /venues ran 3 queries', str(raised.exception))
+
+    def test_server_timing_and_budget_warning(self):
+        """Test the queries of a request are reported, and logged when
+        they are over QUERY_BUDGET
+            : GET /venues
+        """
+        budget = self.app.config['QUERY_BUDGET']
+        self.addCleanup(self.app.config.update, QUERY_BUDGET=budget)
+        self.app.config['QUERY_BUDGET'] = 1
+
+        with self.assertLogs(self.app.logger, logging.WARNING) as logs:
+            res = self.client().get('/venues')
+
+        self.assertIn('db;dur=', res.headers['Server-Timing'])
+        self.assertIn('desc="3 queries"', res.headers['Server-Timing'])
+        self.assertEqual(logs.records[0].route, '/venues')
+        self.assertEqual(logs.records[0].queries, 3)
@@ -0,0 +1,61 @@
+import json
+
+from app import db, ArchivedShow, Venue
+from tests.test_fyyur import FyyurTestCase
+
+
+class RecommendationsTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue(genres=['Jazz', 'Folk'])
+        self.jazz_id = self.create_artist(name='Jazz Band', genres=['Jazz'])
+        self.punk_id = self.create_artist(
+            name='Punk Band', genres=['Rock n Roll', 'Punk'])
+        self.create_artist(name='Classical Band', genres=['Classical'])
+        self.create_show(
+            self.venue_id, self.punk_id, self.days_from_now(-400))
+
+    def recommend(self, **kwargs):
+        return [(artist['name'], artist['score']) for artist in
+                Venue.recommended_artists(self.venue_id, **kwargs)]
+
+    def test_ranking(self):
+        """Test artists rank by their genres and those of the venue's shows,
+        leaving out artists sharing none"""
+        self.assertEqual(self.recommend(),
+                         [('Punk Band', 0.5), ('Jazz Band', 0.25)])
+        self.assertEqual(self.recommend(history_weight=0),
+                         [('Jazz Band', 0.5), ('Punk Band', 0.0)])
+
+    def test_archived_shows_count(self):
+        """Test the history includes the archived shows of the venue"""
+        before = self.recommend()
+
+        ArchivedShow.archive(self.days_from_now(-100))
+        db.session.commit()
+
+        self.assertEqual(ArchivedShow.query.count(), 1)
+        self.assertEqual(self.recommend(), before)
+
+    def test_recommendations_page(self):
+        """Test the page links to the venue and the recommended artists
+            : GET /venues/<int:venue_id>/recommendations
+        """
+        res = self.client().get(f'/venues/{self.venue_id}/recommendations')
+        body = res.get_data(as_text=True)
+        venue_page = self.client().get(f'/venues/{self.venue_id}')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(f'href="/venues/{self.venue_id}"', body)
+        self.assertIn(f'href="/artists/{self.jazz_id}"', body)
+        self.assertIn(f'href="/venues/{self.venue_id}/recommendations"',
+                      venue_page.get_data(as_text=True))
+
+    def test_recommendations_of_missing_venue(self):
+        """Test recommendations for a venue that does not exist
+            : GET /api/venues/<int:venue_id>/recommendations
+        """
+        res = self.client().get('/api/venues/999/recommendations')
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(json.loads(res.data)['status'], 'failed')
@@ -0,0 +1,139 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import Show
+from scheduling import expand_schedule
+from tests.test_fyyur import FyyurTestCase
+
+
+class ExpandScheduleTestCase(unittest.TestCase):
+    def test_recurrence_rule(self):
+        """Test a rule expands to its occurrences from dtstart"""
+        times = expand_schedule(
+            rule='FREQ=WEEKLY;COUNT=3', dtstart='2030-01-04T20:00:00')
+
+        self.assertEqual(times, [
+            datetime(2030, 1, 4, 20) + timedelta(weeks=week)
+            for week in range(3)
+        ])
+
+    def test_start_times_are_sorted_utc_and_distinct(self):
+        """Test listed start times are normalized to naive UTC"""
+        times = expand_schedule(start_times=[
+            '2030-01-05T20:00:00+01:00',
+            '2030-01-04T20:00:00',
+            '2030-01-04T20:00:00',
+        ])
+
+        self.assertEqual(times, [
+            datetime(2030, 1, 4, 20), datetime(2030, 1, 5, 19)])
+
+    def test_malformed_schedules(self):
+        """Test malformed, oversized and overlapping schedules are refused"""
+        with self.assertRaises(ValueError):
+            expand_schedule()
+        with self.assertRaises(ValueError):
+            expand_schedule(rule='FREQ=DAILY;COUNT=2')
+        with self.assertRaises(ValueError):
+            expand_schedule(
+                rule='FREQ=DAILY', dtstart='2030-01-01', max_count=10)
+        with self.assertRaises(ValueError):
+            expand_schedule(
+                start_times=['2030-01-01T20:00', '2030-01-01T21:00'],
+                min_gap=timedelta(hours=2))
+
+
+class ScheduleShowsTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_id = self.create_artist()
+
+    def schedule(self, **payload):
+        payload.setdefault('venue_id', self.venue_id)
+        payload.setdefault('artist_id', self.artist_id)
+        return self.client().post('/shows/schedule', json=payload)
+
+    def test_schedule_recurring_shows(self):
+        """Test a recurrence rule creates every show in one request
+            : POST /shows/schedule
+        """
+        dtstart = self.days_from_now(1)
+        res = self.schedule(
+            rule='FREQ=WEEKLY;COUNT=4', dtstart=dtstart.isoformat())
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(payload['count'], 4)
+        self.assertEqual(
+            [show.start_time for show in
+             Show.query.order_by(Show.start_time)],
+            [dtstart + timedelta(weeks=week) for week in range(4)]
+        )
+
+    def test_schedule_conflict(self):
+        """Test no show is created when one of them is already booked
+            : POST /shows/schedule
+        """
+        booked = self.days_from_now(2)
+        self.create_show(self.venue_id, self.artist_id, booked)
+
+        res = self.schedule(start_times=[
+            self.days_from_now(1).isoformat(),
+            (booked + timedelta(hours=1)).isoformat(),
+        ])
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(len(payload['conflicts']), 1)
+        self.assertEqual(Show.query.count(), 1)
+
+    def test_schedule_race(self):
+        """Test a show booked between the check and the insert is refused
+        like one booked before
+            : POST /shows/schedule
+        """
+        booked = self.days_from_now(2)
+        self.create_show(self.venue_id, self.artist_id, booked)
+        conflicts = Show.conflicts
+        checks = []
+
+        def booked_after_the_check(*args, **kwargs):
+            # The first check runs before the other request commits
+            checks.append(args)
+            return [] if len(checks) == 1 else conflicts(*args, **kwargs)
+
+        with mock.patch.object(
+                Show, 'conflicts', side_effect=booked_after_the_check):
+            res = self.schedule(start_times=[booked.isoformat()])
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(len(payload['conflicts']), 1)
+        self.assertEqual(Show.query.count(), 1)
+
+    def test_schedule_bad_request(self):
+        """Test a missing artist or an empty schedule is refused
+            : POST /shows/schedule
+        """
+        res = self.client().post('/shows/schedule', json={
+            'venue_id': self.venue_id,
+            'start_times': [self.days_from_now(1).isoformat()],
+        })
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(payload['message'], 'artist_id is required')
+        self.assertEqual(self.schedule(start_times=[]).status_code, 400)
+        self.assertEqual(Show.query.count(), 0)
+
+    def test_schedule_unknown_venue(self):
+        """Test scheduling at a venue that does not exist
+            : POST /shows/schedule
+        """
+        res = self.schedule(
+            venue_id=999, start_times=[self.days_from_now(1).isoformat()])
+
+        self.assertEqual(res.status_code, 404)
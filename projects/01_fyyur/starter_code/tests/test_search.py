@@ -0,0 +1,167 @@
+import html
+import json
+import re
+
+from tests.test_fyyur import FyyurTestCase
+
+
+class SearchTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hop_id = self.create_venue()
+        self.create_venue(name='Park Square Live Music & Coffee',
+                          genres=['Folk'])
+        self.create_venue(name='The Dueling Pianos Bar', city='New York',
+                          state='NY', genres=['Classical'])
+        self.guns_id = self.create_artist()
+        self.create_artist(name='Matt Quevedo', city='New York', state='NY',
+                           genres=['Jazz'])
+
+    def test_search_venues_by_partial_name(self):
+        """Test a partial, case-insensitive search of venues
+            : POST /api/venues/search
+        """
+        res = self.client().post(
+            '/api/venues/search', data={'search_term': 'hOP'})
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['count'], 1)
+        self.assertEqual(payload['data'][0]['id'], self.hop_id)
+
+    def test_search_ranks_closest_names_first(self):
+        """Test results are ranked by similarity to the search term
+            : POST /api/venues/search
+        """
+        res = self.client().post(
+            '/api/venues/search', data={'search_term': 'Music'})
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(payload['data'][0]['name'], 'The Musical Hop')
+
+    def test_search_artists_by_city(self):
+        """Test artists match on their city
+            : POST /api/artists/search
+        """
+        res = self.client().post(
+            '/api/artists/search', data={'search_term': 'new york'})
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([a['name'] for a in payload['data']],
+                         ['Matt Quevedo'])
+
+    def test_search_escapes_wildcards(self):
+        """Test LIKE wildcards in the search term match literally
+            : POST /api/venues/search
+        """
+        res = self.client().post(
+            '/api/venues/search', data={'search_term': '%'})
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(payload['count'], 0)
+
+    def test_search_with_invalid_page(self):
+        """Test page numbers below 1 are rejected
+            : POST /venues/search?page=0
+        """
+        for path in ('/venues/search', '/artists/search', '/search'):
+            for page in (0, -3):
+                res = self.client().post(
+                    f'{path}?page={page}', data={'search_term': 'a'})
+
+                self.assertEqual(res.status_code, 400, f'{path} {page}')
+
+
+class CombinedSearchTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hop_id = self.create_venue()
+        self.create_venue(name='The Dueling Pianos Bar', city='New York',
+                          state='NY', genres=['Classical'])
+        self.guns_id = self.create_artist()
+        self.create_artist(name='Matt Quevedo', city='New York', state='NY',
+                           genres=['Jazz'])
+
+    def search(self, **params):
+        res = self.client().get('/api/search', query_string=params)
+        return res, json.loads(res.data)
+
+    def test_search_venues_and_artists(self):
+        """Test venues and artists are ranked together
+            : GET /api/search
+        """
+        res, payload = self.search(search_term='San Francisco')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(
+            {(r['type'], r['id']) for r in payload['data']},
+            {('venues', self.hop_id), ('artists', self.guns_id)})
+
+    def test_search_by_location(self):
+        """Test a term like "New York, NY" searches by city and state
+            : GET /api/search
+        """
+        _, payload = self.search(search_term='new york, ny')
+
+        self.assertEqual(
+            sorted(r['name'] for r in payload['data']),
+            ['Matt Quevedo', 'The Dueling Pianos Bar'])
+
+    def test_search_filters(self):
+        """Test results are narrowed down by type and genre
+            : GET /api/search
+        """
+        _, by_type = self.search(search_term='', state='NY', type='artists')
+        _, by_genre = self.search(search_term='', genre='Jazz')
+
+        self.assertEqual([r['name'] for r in by_type['data']],
+                         ['Matt Quevedo'])
+        self.assertEqual(
+            sorted(r['name'] for r in by_genre['data']),
+            ['Matt Quevedo', 'The Musical Hop'])
+
+    def test_search_links_to_results(self):
+        """Test the results page links to each record's page
+            : GET /search
+        """
+        res = self.client().get('/search?search_term=San+Francisco')
+        body = res.get_data(as_text=True)
+
+        self.assertIn(f'href="/venues/{self.hop_id}"', body)
+        self.assertIn(f'href="/artists/{self.guns_id}"', body)
+
+    def test_location_search_next_page(self):
+        """Test the next page of a location search keeps its results
+            : GET /search?page=2
+        """
+        per_page = self.app.config['SEARCH_RESULTS_PER_PAGE']
+        self.app.config['SEARCH_RESULTS_PER_PAGE'] = 1
+        try:
+            first = self.client().get(
+                '/search?search_term=San+Francisco%2C+CA').get_data(
+                    as_text=True)
+            next_url = html.unescape(
+                re.search(r'<li class="next"><a href="([^"]+)"',
+                          first).group(1))
+            second = self.client().get(next_url).get_data(as_text=True)
+        finally:
+            self.app.config['SEARCH_RESULTS_PER_PAGE'] = per_page
+
+        self.assertIn('Number of search results: 2', first)
+        self.assertIn('Number of search results: 2', second)
+
+    def test_search_bad_type(self):
+        """Test a search of an unknown type is refused
+            : GET /api/search
+        """
+        res, payload = self.search(search_term='a', type='shows')
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(payload['status'], 'failed')
@@ -0,0 +1,52 @@
+import json
+
+from profiling import count_queries
+from tests.test_fyyur import FyyurTestCase
+
+
+class ShowListingTestCase(FyyurTestCase):
+    def create_shows(self, count):
+        venue_id = self.create_venue()
+        for i in range(count):
+            artist_id = self.create_artist(name=f'Artist {i}')
+            self.create_show(venue_id, artist_id, self.days_from_now(i + 1))
+
+    def test_fetch_shows(self):
+        """Test the show listing carries the venue and artist names
+            : GET /api/shows
+        """
+        self.create_shows(3)
+
+        res = self.client().get('/api/shows')
+
+        payload = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [show['artist_name'] for show in payload],
+            ['Artist 0', 'Artist 1', 'Artist 2'])
+        self.assertEqual(payload[0]['venue_name'], 'The Musical Hop')
+
+    def test_show_listing_queries_do_not_grow_with_shows(self):
+        """Test the show listing page loads its shows in one query
+            : GET /shows
+        """
+        self.create_shows(1)
+        with count_queries() as few:
+            self.client().get('/shows').get_data()
+        self.create_shows(5)
+        with count_queries() as many:
+            res = self.client().get('/shows')
+            body = res.get_data(as_text=True)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('Artist 4', body)
+        self.assertEqual(len(many), len(few))
+
+    def test_fetch_shows_with_invalid_cursor(self):
+        """Test the show listing rejects a malformed cursor
+            : GET /shows?cursor=...
+        """
+        res = self.client().get('/shows?cursor=not-a-cursor')
+
+        self.assertEqual(res.status_code, 400)
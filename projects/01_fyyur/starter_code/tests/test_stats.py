@@ -0,0 +1,70 @@
+import io
+import json
+from unittest import mock
+
+from tests.test_fyyur import FyyurTestCase
+
+
+class InternalStatsTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        token = self.app.config.get('INTERNAL_STATS_TOKEN')
+        self.addCleanup(self.app.config.update, INTERNAL_STATS_TOKEN=token)
+        self.app.config['INTERNAL_STATS_TOKEN'] = 'secret'
+
+    def get(self, path, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return self.client().get(path, headers=headers)
+
+    def test_stats_with_token(self):
+        """Test the pool and cache statistics are served to the token holder
+            : GET /db/pool, GET /cache/stats
+        """
+        pool = self.get('/db/pool', token='secret')
+        stats = self.get('/cache/stats', token='secret')
+
+        self.assertEqual(pool.status_code, 200)
+        self.assertIn('checked_out', json.loads(pool.data))
+        self.assertEqual(stats.status_code, 200)
+        self.assertIn('hits', json.loads(stats.data))
+
+    def test_stats_are_hidden(self):
+        """Test the statistics are not served without the right token
+            : GET /db/pool, GET /cache/stats
+        """
+        for path in ('/db/pool', '/cache/stats'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+                self.assertEqual(
+                    self.get(path, token='guess').status_code, 404)
+
+        self.app.config['INTERNAL_STATS_TOKEN'] = None
+        self.assertEqual(self.get('/db/pool', token='None').status_code, 404)
+
+    def test_pool_stats_command(self):
+        """Test the command reads the statistics with the token
+            : flask pool-stats
+        """
+        body = io.BytesIO(json.dumps({'checked_out': 2}).encode())
+        with mock.patch('urllib.request.urlopen',
+                        return_value=body) as urlopen:
+            result = self.app.test_cli_runner().invoke(
+                args=['pool-stats', '--url', 'http://fyyur.test/'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, 'checked_out: 2\n')
+        pool_request = urlopen.call_args[0][0]
+        self.assertEqual(pool_request.full_url, 'http://fyyur.test/db/pool')
+        self.assertEqual(
+            pool_request.get_header('Authorization'), 'Bearer secret')
+
+    def test_pool_stats_command_without_token(self):
+        """Test the command refuses to run without a token
+            : flask pool-stats
+        """
+        self.app.config['INTERNAL_STATS_TOKEN'] = None
+
+        result = self.app.test_cli_runner().invoke(args=['pool-stats'])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('INTERNAL_STATS_TOKEN must be set', result.output)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db, Show, ShowStatsCutoff, VenueStats, ArtistStats
+from tests.test_fyyur import FyyurTestCase
+
+
+class ShowStatsTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.other_venue_id = self.create_venue(name='The Dueling Pianos Bar')
+        self.artist_id = self.create_artist()
+
+    def stats(self, model, id):
+        db.session.expire_all()
+        row = model.query.get(id)
+        return row and (row.past_shows_count, row.upcoming_shows_count)
+
+    def test_insert_counts_past_and_upcoming(self):
+        """Test new shows are counted on both sides as they are written"""
+        upcoming = self.days_from_now(2)
+        self.create_show(self.venue_id, self.artist_id, upcoming)
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(5))
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(-1))
+
+        venue = VenueStats.query.get(self.venue_id)
+        self.assertEqual(self.stats(VenueStats, self.venue_id), (1, 2))
+        self.assertEqual(self.stats(ArtistStats, self.artist_id), (1, 2))
+        self.assertEqual(venue.next_show_time, upcoming)
+
+    def test_update_and_delete(self):
+        """Test moving and deleting a show updates both venues"""
+        show_id = self.create_show(
+            self.venue_id, self.artist_id, self.days_from_now(2))
+
+        Show.query.get(show_id).venue_id = self.other_venue_id
+        db.session.commit()
+        self.assertEqual(self.stats(VenueStats, self.venue_id), (0, 0))
+        self.assertEqual(self.stats(VenueStats, self.other_venue_id), (0, 1))
+
+        db.session.delete(Show.query.get(show_id))
+        db.session.commit()
+        self.assertEqual(self.stats(VenueStats, self.other_venue_id), (0, 0))
+        self.assertEqual(self.stats(ArtistStats, self.artist_id), (0, 0))
+
+    def test_advance_moves_started_shows(self):
+        """Test advancing the cutoff moves started shows to the past"""
+        upcoming = self.days_from_now(3)
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+        self.create_show(self.venue_id, self.artist_id, upcoming)
+
+        ShowStatsCutoff.advance(now=self.days_from_now(2))
+        db.session.commit()
+
+        self.assertEqual(self.stats(VenueStats, self.venue_id), (1, 1))
+        self.assertEqual(
+            VenueStats.query.get(self.venue_id).next_show_time, upcoming)
+
+    def test_rebuild_matches_incremental_updates(self):
+        """Test a rebuild finds the counts the trigger kept
+            : flask refresh-stats --rebuild
+        """
+        for days in (-3, -1, 1, 2):
+            self.create_show(
+                self.venue_id, self.artist_id, self.days_from_now(days))
+        before = self.stats(VenueStats, self.venue_id)
+
+        result = self.app.test_cli_runner().invoke(
+            args=['refresh-stats', '--rebuild'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.stats(VenueStats, self.venue_id), before)
+        self.assertEqual(before, (2, 2))
+
+    def test_refused_show_is_not_counted(self):
+        """Test a show the database refuses leaves the counts alone"""
+        self.create_show(self.venue_id, self.artist_id, self.days_from_now(1))
+
+        with self.assertRaises(IntegrityError):
+            self.create_show(
+                self.venue_id, self.artist_id,
+                self.days_from_now(1) + timedelta(hours=1))
+        db.session.rollback()
+
+        self.assertEqual(self.stats(VenueStats, self.venue_id), (0, 1))
@@ -0,0 +1,55 @@
+from tests.test_fyyur import FyyurTestCase
+
+
+class StreamTemplateTestCase(FyyurTestCase):
+    def setUp(self):
+        super().setUp()
+        self.venue_id = self.create_venue()
+        self.artist_ids = [
+            self.create_artist(name=f'Artist {i}') for i in range(3)]
+        self.create_show(
+            self.venue_id, self.artist_ids[0], self.days_from_now(1))
+
+    def test_artists_page_is_streamed(self):
+        """Test the artists page is sent while its rows are fetched
+            : GET /artists
+        """
+        res = self.client().get('/artists')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_streamed)
+        for i in range(3):
+            self.assertIn(f'Artist {i}'.encode(), res.data)
+
+    def test_shows_page_is_streamed(self):
+        """Test the shows page lists the venue and the artist of each show
+            : GET /shows
+        """
+        res = self.client().get('/shows')
+
+        self.assertTrue(res.is_streamed)
+        self.assertIn(b'The Musical Hop', res.data)
+        self.assertIn(b'Artist 0', res.data)
+
+    def test_flashed_messages_are_shown_once(self):
+        """Test a message flashed before a streamed page is consumed by it
+            : GET /artists
+        """
+        client = self.client()
+        with client.session_transaction() as session:
+            session['_flashes'] = [('message', 'Artist was deleted')]
+
+        first = client.get('/artists').data
+        second = client.get('/artists').data
+
+        self.assertIn(b'Artist was deleted', first)
+        self.assertNotIn(b'Artist was deleted', second)
+
+    def test_bad_cursor(self):
+        """Test a malformed cursor fails before the page is rendered
+            : GET /artists
+        """
+        res = self.client().get('/artists?cursor=not-a-cursor')
+
+        self.assertEqual(res.status_code, 400)
+        self.assertNotIn(b'Artist 0', res.data)
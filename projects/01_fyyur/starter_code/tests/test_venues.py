@@ -0,0 +1,52 @@
+from app import Venue
+from tests.test_fyyur import FyyurTestCase
+
+
+class VenueAreasTestCase(FyyurTestCase):
+    def test_venues_grouped_by_area(self):
+        """Test venues are grouped by city and state with their upcoming
+        show counts"""
+        hop_id = self.create_venue()
+        park_id = self.create_venue(name='Park Square Live Music & Coffee')
+        self.create_venue(name='The Dueling Pianos Bar', city='New York',
+                          state='NY')
+        artist_id = self.create_artist()
+        self.create_show(hop_id, artist_id, self.days_from_now(3))
+        self.create_show(park_id, artist_id, self.days_from_now(-3))
+
+        areas = Venue.areas().items
+
+        self.assertEqual(
+            [(area['state'], area['city']) for area in areas],
+            [('CA', 'San Francisco'), ('NY', 'New York')])
+        self.assertEqual(areas[0]['venues'], [
+            {'id': park_id, 'name': 'Park Square Live Music & Coffee',
+             'num_upcoming_shows': 0},
+            {'id': hop_id, 'name': 'The Musical Hop',
+             'num_upcoming_shows': 1},
+        ])
+
+    def test_fetch_venues_page(self):
+        """Test the venues page lists every area
+            : GET /venues
+        """
+        self.create_venue()
+        self.create_venue(name='The Dueling Pianos Bar', city='New York',
+                          state='NY')
+
+        res = self.client().get('/venues')
+
+        body = res.get_data(as_text=True)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('The Musical Hop', body)
+        self.assertIn('The Dueling Pianos Bar', body)
+
+    def test_fetch_venues_without_any(self):
+        """Test the venues page when there is no venue
+            : GET /venues
+        """
+        res = self.client().get('/venues')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(Venue.areas().items, [])
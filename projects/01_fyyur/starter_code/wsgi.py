@@ -0,0 +1,11 @@
+"""WSGI entry point
+
+The application is created at import time without touching the database,
+so servers can preload it once and fork workers from it, e.g.
+
+    gunicorn --preload --workers 4 wsgi:app
+"""
+from app import create_app
+
+
+app = create_app(migrations=False)